@@ -101,6 +101,29 @@ else:
         }
     }
 
+# Enforce that flights of an airplane never overlap with a PostgreSQL
+# exclusion constraint (btree_gist) on top of the validation. Read by
+# migration 0010, which refuses to add it while overlapping flights
+# exist; to change it later, migrate airservice back to 0009 and forward.
+FLIGHT_OVERLAP_CONSTRAINT = (
+    os.environ.get("FLIGHT_OVERLAP_CONSTRAINT") == "True"
+)
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# Version stamps and cached responses must be shared by all workers, so
+# multi-process deployments set a shared backend such as
+# django.core.cache.backends.redis.RedisCache; LocMem is per process.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -152,6 +175,15 @@ AUTH_USER_MODEL = "user.User"
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 5,
+    "DEFAULT_RENDERER_CLASSES": [
+        "airservice.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "airservice.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "airservice.permissions.IsAdminAllOrIsAuthenticatedReadOnly",
     ],
@@ -179,6 +211,46 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# How long a seat selected on a flight stays reserved for the customer
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+# How far ahead recurring flight schedules are materialized into flights
+FLIGHT_SCHEDULE_HORIZON = timedelta(days=90)
+
+# Connection search: allowed layover between legs, the number of
+# shortest route sequences considered and itineraries returned per search
+CONNECTION_MIN_LAYOVER = timedelta(minutes=45)
+CONNECTION_MAX_LAYOVER = timedelta(hours=24)
+CONNECTION_MAX_PATHS = 50
+CONNECTION_MAX_RESULTS = 20
+
+# Default and maximum number of airports returned by autocomplete
+AIRPORT_AUTOCOMPLETE_LIMIT = 10
+AIRPORT_AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Streaming exports: rows fetched per database round trip and bytes
+# collected before a block is written out
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+# Cached catalogue responses are fresh for RESPONSE_CACHE_TTL, then
+# served stale for up to RESPONSE_CACHE_STALE_TTL while one worker
+# refreshes them, on a thread unless RESPONSE_CACHE_REFRESH_IN_BACKGROUND
+# is off. Changes invalidate entries right away. Concurrent misses wait
+# up to RESPONSE_CACHE_LOCK_WAIT for the worker holding the refresh lock,
+# which expires after RESPONSE_CACHE_LOCK_TTL.
+RESPONSE_CACHE_TTL = timedelta(minutes=10)
+RESPONSE_CACHE_STALE_TTL = timedelta(minutes=5)
+RESPONSE_CACHE_REFRESH_IN_BACKGROUND = True
+RESPONSE_CACHE_LOCK_TTL = timedelta(seconds=30)
+RESPONSE_CACHE_LOCK_WAIT = timedelta(seconds=3)
+
+# How long responses of requests with an Idempotency-Key header are replayed
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# How long a retry waits for the first request with the same key to finish
+# before it takes the key over (the first one is presumed dead)
+IDEMPOTENCY_KEY_LEASE = timedelta(minutes=1)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
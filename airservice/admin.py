@@ -3,12 +3,14 @@ from django.contrib import admin
 from airservice.models import (
     Ticket,
     Flight,
+    FlightSchedule,
     Order,
     Airport,
     AirplaneType,
     Airplane,
     Crew,
     Route,
+    SeatHold,
 )
 
 admin.site.register(Airport)
@@ -17,6 +19,8 @@ admin.site.register(AirplaneType)
 admin.site.register(Airplane)
 admin.site.register(Crew)
 admin.site.register(Flight)
+admin.site.register(FlightSchedule)
+admin.site.register(SeatHold)
 
 
 class TicketAdmin(admin.TabularInline):
@@ -0,0 +1,87 @@
+from bisect import bisect_left
+
+from django.db import connection
+from django.db.models.functions import Lower
+
+from airservice.cache import VersionedValue
+from airservice.models import Airport
+
+
+VERSION_NAME = "airport_index"
+FIELDS = ("id", "name", "country")
+
+
+class AirportIndex:
+    """Airports sorted by lower-cased name.
+
+    Prefix matches are a contiguous slice found by binary search; the
+    remaining substring matches need a scan, which is cheap for the
+    number of airports an airline serves.
+    """
+
+    def __init__(self, airports):
+        self.entries = sorted(
+            (name.lower(), airport_id, name, country)
+            for airport_id, name, country in airports
+        )
+        self.keys = [entry[0] for entry in self.entries]
+
+    @classmethod
+    def build(cls):
+        return cls(Airport.objects.order_by().values_list(*FIELDS))
+
+    def search(self, query, limit):
+        query = query.lower()
+        start = bisect_left(self.keys, query)
+        end = start
+        while (
+            end < len(self.keys)
+            and end - start < limit
+            and self.keys[end].startswith(query)
+        ):
+            end += 1
+        entries = self.entries[start:end]
+        if len(entries) < limit:
+            entries += [
+                entry
+                for entry in self.entries
+                if query in entry[0] and not entry[0].startswith(query)
+            ][:limit - len(entries)]
+        return [
+            dict(zip(FIELDS, (airport_id, name, country)))
+            for _, airport_id, name, country in entries
+        ]
+
+
+_airport_index = VersionedValue(
+    VERSION_NAME, AirportIndex.build, (Airport,)
+)
+
+
+def get_airport_index():
+    return _airport_index.get()
+
+
+def search_database(query, limit):
+    """Same matches as AirportIndex.search, served on PostgreSQL by the
+    text_pattern_ops and trigram indexes on LOWER(name)."""
+    query = query.lower()
+    airports = (
+        Airport.objects.alias(name_lower=Lower("name"))
+        .order_by("name_lower")
+        .values(*FIELDS)
+    )
+    matches = list(airports.filter(name_lower__startswith=query)[:limit])
+    if len(matches) < limit:
+        matches += airports.filter(name_lower__contains=query).exclude(
+            name_lower__startswith=query
+        )[:limit - len(matches)]
+    return matches
+
+
+def search_airports(query, limit):
+    """Airports whose name starts with ``query``, followed by those that
+    merely contain it, both alphabetically, at most ``limit`` in total."""
+    if connection.vendor == "postgresql":
+        return search_database(query, limit)
+    return get_airport_index().search(query, limit)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AirserviceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "airservice"
+
+    def ready(self):
+        import airservice.signals  # noqa: F401
@@ -0,0 +1,220 @@
+import logging
+import threading
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import CharField, Count, Max, Value
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "airservice:version:{}"
+DELETED_AT_KEY = "airservice:deleted_at:{}"
+LOCK_KEY = "{}:lock"
+
+# Backends whose entries are only seen by the process writing them
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# Version bumps registered by this thread that have not run yet
+_pending = threading.local()
+
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="airservice-cache-refresh"
+)
+
+
+def cache_is_shared():
+    """Whether the default cache is shared by all worker processes, so
+    a version bump in one of them is seen by the others."""
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+def get_change_stamps(models):
+    """MAX(updated_at) and COUNT(*) of each of ``models``, read with one
+    query and keyed by model label; edits and inserts move the first,
+    deletions the second."""
+    queries = [
+        model.objects.order_by()
+        .annotate(label=Value(model._meta.label, CharField()))
+        .values("label")
+        .annotate(updated_at=Max("updated_at"), count=Count("pk"))
+        for model in models
+    ]
+    return {
+        row["label"]: row
+        for row in queries[0].union(*queries[1:], all=True)
+    }
+
+
+def get_version(name):
+    """Return the current version stamp of ``name``.
+
+    Stamps are random tokens kept in the default cache, so an evicted
+    stamp is replaced by a new one instead of repeating an old value.
+    """
+    return cache.get_or_set(VERSION_KEY.format(name), uuid.uuid4().hex, None)
+
+
+def get_versions(names):
+    """Return the version stamps of ``names`` with one cache lookup."""
+    keys = [VERSION_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    return [
+        found[key] if key in found
+        else cache.get_or_set(key, uuid.uuid4().hex, None)
+        for key in keys
+    ]
+
+
+def bump_version(name):
+    cache.set(VERSION_KEY.format(name), uuid.uuid4().hex, None)
+
+
+class _VersionBump:
+    """on_commit callback bumping ``name``; remembers that it ran."""
+
+    def __init__(self, name):
+        self.name = name
+        self.done = False
+
+    def __call__(self):
+        bump_version(self.name)
+        self.done = True
+
+
+def _pending_bumps():
+    if not hasattr(_pending, "bumps"):
+        # Weak references: a rollback discards the transaction's
+        # callbacks, and with them the bumps that will never run
+        _pending.bumps = weakref.WeakSet()
+    return _pending.bumps
+
+
+def bump_version_on_commit(name):
+    # Bumping earlier would let a value be rebuilt from rows that are
+    # not committed yet, and kept after a rollback.
+    bump = _VersionBump(name)
+    transaction.on_commit(bump)
+    if not bump.done:
+        _pending_bumps().add(bump)
+
+
+def has_pending_versions():
+    """Whether the current transaction changed versioned data that is
+    not committed yet, so cached values do not reflect it."""
+    return any(not bump.done for bump in _pending_bumps())
+
+
+def model_version_name(model):
+    return f"model:{model._meta.label}"
+
+
+def bump_model_versions(*models):
+    """Invalidate cached responses built from ``models`` once the
+    current transaction commits; needed after bulk_create() and
+    update(), which send no signals."""
+    for model in models:
+        bump_version_on_commit(model_version_name(model))
+
+
+def get_deleted_at(model):
+    """When a row of ``model`` was last deleted, if still known."""
+    return cache.get(DELETED_AT_KEY.format(model._meta.label))
+
+
+def set_deleted_at(model):
+    cache.set(DELETED_AT_KEY.format(model._meta.label), timezone.now(), None)
+
+
+class VersionedValue:
+    """Process-local value built from ``models`` by ``build`` and rebuilt
+    only after the version stamp ``name`` was bumped.
+
+    With a process-local cache the stamps of other workers are not
+    visible, so the change stamps of ``models`` are read from the
+    database instead, at the cost of one query per lookup unless the
+    caller already read them with get_change_stamps().
+    """
+
+    def __init__(self, name, build, models):
+        self.name = name
+        self.build = build
+        self.models = models
+        self.value = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def get_current_version(self, change_stamps=None):
+        if cache_is_shared():
+            return get_version(self.name)
+        labels = [model._meta.label for model in self.models]
+        if change_stamps is None or not all(
+            label in change_stamps for label in labels
+        ):
+            change_stamps = get_change_stamps(self.models)
+        return tuple(
+            (
+                label,
+                change_stamps[label]["updated_at"],
+                change_stamps[label]["count"],
+            )
+            for label in labels
+        )
+
+    def get(self, change_stamps=None):
+        version = self.get_current_version(change_stamps)
+        if self.value is not None and self.version == version:
+            return self.value
+        with self.lock:
+            if self.value is None or self.version != version:
+                self.value = self.build()
+                self.version = version
+            return self.value
+
+
+def acquire_lock(key, timeout):
+    """Take the lock ``key`` in the cache backend, shared by all
+    workers. Return a token for release_lock(), or None when the lock
+    is held; it expires after ``timeout`` seconds if never released."""
+    token = uuid.uuid4().hex
+    if cache.add(LOCK_KEY.format(key), token, timeout):
+        return token
+    return None
+
+
+def is_locked(key):
+    return cache.get(LOCK_KEY.format(key)) is not None
+
+
+def release_lock(key, token):
+    # Only the holder releases, not a worker that took over the lock
+    # after it expired
+    if cache.get(LOCK_KEY.format(key)) == token:
+        cache.delete(LOCK_KEY.format(key))
+
+
+def _run_and_close_connections(function):
+    try:
+        function()
+    except Exception:
+        logger.exception("Refreshing a cached value failed")
+    finally:
+        connections.close_all()
+
+
+def refresh_in_background(function):
+    """Run ``function`` on a worker thread and return its future, or
+    run it right away when RESPONSE_CACHE_REFRESH_IN_BACKGROUND is
+    off."""
+    if settings.RESPONSE_CACHE_REFRESH_IN_BACKGROUND:
+        return _refresh_executor.submit(_run_and_close_connections, function)
+    function()
+    return None
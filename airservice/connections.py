@@ -0,0 +1,143 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from heapq import heappop, heappush
+
+from django.conf import settings
+from django.utils import timezone
+
+from airservice.models import Flight
+from airservice.route_graph import get_route_graph
+
+
+def find_route_paths(graph, source_id, destination_id, max_legs, limit):
+    """Return up to ``limit`` simple paths as (total distance, route ids),
+    shortest first (fewer legs first on ties), with at most ``max_legs``
+    legs.
+
+    Partial paths are expanded shortest first, so the search stops as soon
+    as ``limit`` paths have reached the destination instead of enumerating
+    every path of a densely connected graph.
+    """
+    if source_id == destination_id or limit <= 0:
+        return []
+    paths = []
+    queue = [(0, 0, (), source_id, frozenset((source_id,)))]
+    while queue:
+        distance, legs, route_ids, airport_id, visited = heappop(queue)
+        if airport_id == destination_id:
+            paths.append((distance, route_ids))
+            if len(paths) == limit:
+                break
+            continue
+        if legs == max_legs:
+            continue
+        for next_airport_id, route_id, leg_distance in graph.routes_from(
+            airport_id
+        ):
+            if next_airport_id in visited:
+                continue
+            heappush(
+                queue,
+                (
+                    distance + leg_distance,
+                    legs + 1,
+                    route_ids + (route_id,),
+                    next_airport_id,
+                    visited | {next_airport_id},
+                ),
+            )
+    return paths
+
+
+def find_connections(
+    source_id,
+    destination_id,
+    day,
+    max_legs=3,
+    limit=None,
+    graph=None,
+):
+    """Itineraries from ``source_id`` to ``destination_id`` departing on
+    ``day`` with at most ``max_legs`` flights, at most ``limit``
+    (CONNECTION_MAX_RESULTS by default) of them.
+
+    Candidate route sequences come from a search over the cached route
+    graph;
+    the flights of all candidate routes are then loaded with one query and
+    chained so that every connection respects CONNECTION_MIN_LAYOVER and
+    CONNECTION_MAX_LAYOVER. Itineraries are ordered by arrival, then by
+    distance.
+    """
+    if limit is None:
+        limit = settings.CONNECTION_MAX_RESULTS
+    if graph is None:
+        graph = get_route_graph()
+    paths = find_route_paths(
+        graph,
+        source_id,
+        destination_id,
+        max_legs,
+        settings.CONNECTION_MAX_PATHS,
+    )
+    if not paths:
+        return []
+
+    min_layover = settings.CONNECTION_MIN_LAYOVER
+    max_layover = settings.CONNECTION_MAX_LAYOVER
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    day_end = day_start + timedelta(days=1)
+    window_end = day_end + (max_legs - 1) * (max_layover + timedelta(days=1))
+
+    flights_by_route = defaultdict(list)
+    for flight in Flight.objects.select_related("route", "airplane").filter(
+        route_id__in={
+            route_id for _, route_ids in paths for route_id in route_ids
+        },
+        departure_date__gte=day_start,
+        departure_date__lt=window_end,
+    ).order_by("departure_date"):
+        flights_by_route[flight.route_id].append(flight)
+    departures_by_route = {
+        route_id: [flight.departure_date for flight in flights]
+        for route_id, flights in flights_by_route.items()
+    }
+
+    itineraries = []
+
+    def chain(route_ids, legs, distance):
+        if len(legs) == len(route_ids):
+            itineraries.append((legs[-1].arrival_date, distance, list(legs)))
+            return
+        route_id = route_ids[len(legs)]
+        flights = flights_by_route.get(route_id, [])
+        if legs:
+            earliest = legs[-1].arrival_date + min_layover
+            latest = legs[-1].arrival_date + max_layover
+        else:
+            earliest = day_start
+            latest = day_end - timedelta.resolution
+        start = bisect_left(departures_by_route.get(route_id, []), earliest)
+        for flight in flights[start:]:
+            if flight.departure_date > latest:
+                break
+            legs.append(flight)
+            chain(route_ids, legs, distance)
+            legs.pop()
+
+    for distance, route_ids in paths:
+        if not route_ids:
+            continue
+        chain(route_ids, [], distance)
+
+    itineraries.sort(key=lambda itinerary: itinerary[:2])
+    return [
+        {
+            "legs": legs,
+            "stops": len(legs) - 1,
+            "total_distance": distance,
+            "departure_date": legs[0].departure_date,
+            "arrival_date": arrival_date,
+        }
+        for arrival_date, distance, legs in itineraries[:limit]
+    ]
@@ -0,0 +1,24 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The seat is not available."
+    default_code = "seat_conflict"
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = (
+        "A request with this Idempotency-Key is still being processed."
+    )
+    default_code = "idempotency_key_in_progress"
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = (
+        "This Idempotency-Key was already used with a different request."
+    )
+    default_code = "idempotency_key_mismatch"
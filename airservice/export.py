@@ -0,0 +1,133 @@
+import csv
+import zlib
+
+from django.conf import settings
+
+from airservice.models import Flight, Ticket
+from airservice.renderers import ORJSONRenderer
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Exported columns per dataset as (column name, values() lookup)
+DATASETS = {
+    "flights": (
+        ("id", "id"),
+        ("route_id", "route_id"),
+        ("route", "route__display_name"),
+        ("airplane_id", "airplane_id"),
+        ("airplane", "airplane__name"),
+        ("departure_date", "departure_date"),
+        ("arrival_date", "arrival_date"),
+        ("schedule_id", "schedule_id"),
+    ),
+    "tickets": (
+        ("id", "id"),
+        ("order_id", "order_id"),
+        ("user_id", "order__user_id"),
+        ("ordered_at", "order__created_at"),
+        ("flight_id", "flight_id"),
+        ("row", "row"),
+        ("seat", "seat"),
+    ),
+    "manifest": (
+        ("ticket_id", "id"),
+        ("row", "row"),
+        ("seat", "seat"),
+        ("order_id", "order_id"),
+        ("passenger_email", "order__user__email"),
+        ("passenger_first_name", "order__user__first_name"),
+        ("passenger_last_name", "order__user__last_name"),
+    ),
+}
+
+
+def dataset_queryset(dataset, flight_id=None):
+    """Rows of ``dataset`` in a stable order; the manifest lists the
+    tickets of one flight by seat."""
+    if dataset == "flights":
+        return Flight.objects.order_by("id")
+    if dataset == "tickets":
+        return Ticket.objects.order_by("id")
+    return Ticket.objects.filter(flight_id=flight_id).order_by("row", "seat")
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _to_text(value):
+    """ISO 8601 for dates and datetimes, with "Z" for UTC like DRF."""
+    if not hasattr(value, "isoformat"):
+        return value
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def stream_export(
+    queryset,
+    columns,
+    export_format="ndjson",
+    compress=False,
+    chunk_size=None,
+):
+    """Yield the rows of ``queryset`` encoded as NDJSON or CSV (with a
+    header row), optionally gzip-compressed.
+
+    Rows are read with values_list().iterator(), which uses a server-side
+    cursor where the database supports it, and written out in blocks of
+    about ``EXPORT_BUFFER_SIZE`` bytes, so memory does not grow with the
+    size of the export.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    names = [name for name, _ in columns]
+    rows = queryset.values_list(
+        *(lookup for _, lookup in columns)
+    ).iterator(chunk_size=chunk_size)
+
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+
+        def encode(row):
+            return writer.writerow(
+                [_to_text(value) for value in row]
+            ).encode()
+
+        lines = [writer.writerow(names).encode()]
+    else:
+        renderer = ORJSONRenderer()
+
+        def encode(row):
+            return renderer.render(
+                dict(zip(names, map(_to_text, row)))
+            ) + b"\n"
+
+        lines = []
+
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer_size = settings.EXPORT_BUFFER_SIZE
+    size = sum(map(len, lines))
+
+    def flush():
+        block = b"".join(lines)
+        lines.clear()
+        return compressor.compress(block) if compressor else block
+
+    for row in rows:
+        line = encode(row)
+        lines.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            block = flush()
+            size = 0
+            if block:
+                yield block
+    block = flush()
+    if compressor:
+        block += compressor.flush()
+    if block:
+        yield block
@@ -0,0 +1,110 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def parse_fields(value):
+    """Field names of a ``?fields=a,b`` parameter, in order, or None."""
+    if value is None:
+        return None
+    return list(
+        dict.fromkeys(
+            name.strip() for name in value.split(",") if name.strip()
+        )
+    )
+
+
+def _select_related_paths(tree, prefix=""):
+    for name, subtree in tree.items():
+        path = f"{prefix}{name}"
+        if subtree:
+            yield from _select_related_paths(subtree, f"{path}__")
+        else:
+            yield path
+
+
+def narrow_queryset(queryset, fields, extra_columns=()):
+    """Restrict ``queryset`` to what the serializer ``fields`` read.
+
+    select_related and prefetch_related lookups are kept only for the
+    relations the fields go through. Columns are limited with only()
+    when every field maps to a model field, relation or annotation;
+    fields backed by properties or methods ("*" sources, computed
+    attributes) may read any column, so the column list is left alone.
+    ``extra_columns`` are always loaded, e.g. the pagination ordering.
+    """
+    opts = queryset.model._meta
+    annotations = queryset.query.annotations
+    relations = set()
+    whole_relations = set()
+    columns = set(extra_columns)
+    related_columns = set()
+    restrict_columns = True
+
+    for field in fields.values():
+        if field.source == "*":
+            restrict_columns = False
+            continue
+        name, *path = field.source.split(".")
+        if name in annotations:
+            continue
+        try:
+            model_field = opts.get_field(name)
+        except FieldDoesNotExist:
+            restrict_columns = False
+            continue
+        if not model_field.is_relation:
+            columns.add(name)
+            continue
+        relations.add(name)
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(name)
+            if len(path) == 1 and not isinstance(
+                field, serializers.BaseSerializer
+            ):
+                related_columns.add(f"{name}__{path[0]}")
+            else:
+                whole_relations.add(name)
+
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        kept = [
+            path
+            for path in _select_related_paths(select_related)
+            if path.split("__")[0] in relations
+        ]
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+    else:
+        kept = []
+
+    lookups = queryset._prefetch_related_lookups
+    if lookups:
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            *(
+                lookup
+                for lookup in lookups
+                if (
+                    lookup.prefetch_through
+                    if isinstance(lookup, Prefetch)
+                    else lookup
+                ).split("__")[0] in relations
+            )
+        )
+
+    if restrict_columns:
+        joined = {path.split("__")[0] for path in kept}
+        # Relations joined further down must be loaded whole
+        whole_relations |= {
+            path.split("__")[0] for path in kept if "__" in path
+        }
+        columns |= {
+            path
+            for path in related_columns
+            if path.split("__")[0] in joined
+            and path.split("__")[0] not in whole_relations
+        }
+        columns.add(opts.pk.name)
+        queryset = queryset.only(*sorted(columns))
+    return queryset
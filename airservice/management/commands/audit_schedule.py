@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from airservice.models import Flight
+from airservice.scheduling import sweep_overlaps
+
+
+class Command(BaseCommand):
+    help = (
+        "Find all airplane and crew double-bookings across every flight"
+        " with a streaming sort-and-sweep pass."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        airplane_intervals = (
+            Flight.objects.order_by("airplane_id", "departure_date", "id")
+            .values_list("airplane_id", "departure_date", "arrival_date", "id")
+            .iterator(chunk_size=chunk_size)
+        )
+        crew_intervals = (
+            Flight.crew.through.objects.order_by(
+                "crew_id", "flight__departure_date", "flight_id"
+            )
+            .values_list(
+                "crew_id",
+                "flight__departure_date",
+                "flight__arrival_date",
+                "flight_id",
+            )
+            .iterator(chunk_size=chunk_size)
+        )
+
+        conflicts = 0
+        for label, intervals in (
+            ("Airplane", airplane_intervals),
+            ("Crew member", crew_intervals),
+        ):
+            for earlier, later in sweep_overlaps(intervals):
+                conflicts += 1
+                self.stdout.write(
+                    f"{label} {later[0]}: flight {later[3]}"
+                    f" ({later[1]:%Y-%m-%d %H:%M} - {later[2]:%Y-%m-%d %H:%M})"
+                    f" overlaps flight {earlier[3]}"
+                    f" ({earlier[1]:%Y-%m-%d %H:%M}"
+                    f" - {earlier[2]:%Y-%m-%d %H:%M})"
+                )
+
+        if conflicts:
+            self.stdout.write(
+                self.style.ERROR(f"Found {conflicts} schedule conflicts.")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("No schedule conflicts."))
@@ -0,0 +1,120 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from airservice.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+)
+from airservice.serializers import OrderSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure queries and latency of order creation for several"
+        " ticket counts. All benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1, 10, 100],
+            help="Numbers of tickets per order.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Orders created per size; the median latency is reported.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"]
+        repeat = options["repeat"]
+        seats_in_row = 10
+        rows = (sum(sizes) * repeat) // seats_in_row + 1
+
+        self.stdout.write(
+            f"{'tickets':>8} {'queries':>8} {'median ms':>10}"
+        )
+        try:
+            with transaction.atomic():
+                flight, user = self.create_fixtures(rows, seats_in_row)
+                places = (
+                    (row, seat)
+                    for row in range(1, rows + 1)
+                    for seat in range(1, seats_in_row + 1)
+                )
+                for size in sizes:
+                    queries, timings = 0, []
+                    for _ in range(repeat):
+                        payload = {
+                            "tickets": [
+                                {"row": row, "seat": seat, "flight": flight.id}
+                                for row, seat in (
+                                    next(places) for _ in range(size)
+                                )
+                            ]
+                        }
+                        with CaptureQueriesContext(connection) as context:
+                            start = time.perf_counter()
+                            serializer = OrderSerializer(data=payload)
+                            serializer.is_valid(raise_exception=True)
+                            serializer.save(user=user)
+                            timings.append(time.perf_counter() - start)
+                        queries = len(context)
+                    timings.sort()
+                    median = timings[len(timings) // 2] * 1000
+                    self.stdout.write(
+                        f"{size:>8} {queries:>8} {median:>10.2f}"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    @staticmethod
+    def create_fixtures(rows, seats_in_row):
+        source = Airport.objects.create(
+            name="Benchmark source",
+            closest_big_city="Source",
+            country="Benchmark",
+        )
+        destination = Airport.objects.create(
+            name="Benchmark destination",
+            closest_big_city="Destination",
+            country="Benchmark",
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=1000
+        )
+        airplane = Airplane.objects.create(
+            name="Benchmark airplane",
+            rows=rows,
+            seats_in_row=seats_in_row,
+            airplane_type=AirplaneType.objects.create(name="Benchmark type"),
+        )
+        departure_date = timezone.now() + timedelta(days=365)
+        flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_date=departure_date,
+            arrival_date=departure_date + timedelta(hours=2),
+        )
+        user = get_user_model().objects.create_user(
+            email="benchmark@benchmark.com", password="benchmark"
+        )
+        return flight, user
@@ -0,0 +1,170 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from airservice.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Order,
+    Ticket,
+)
+from airservice.renderers import ORJSONRenderer
+from airservice.serializers import (
+    FlightListSerializer,
+    OrderRetrieveSerializer,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare render time and allocations of the stock JSONRenderer and"
+        " ORJSONRenderer on flight list and order detail responses. All"
+        " benchmark data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--flights",
+            type=int,
+            default=1000,
+            help="Flights in the rendered flight list.",
+        )
+        parser.add_argument(
+            "--tickets",
+            type=int,
+            default=100,
+            help="Tickets in the rendered order.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Renders per renderer; the median time is reported.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'response':<24} {'renderer':<15} {'median ms':>10}"
+            f" {'peak KiB':>9}  identical"
+        )
+        try:
+            with transaction.atomic():
+                flights, order = self.create_fixtures(
+                    options["flights"], options["tickets"]
+                )
+                for name, data in (
+                    (
+                        "FlightListSerializer",
+                        FlightListSerializer(flights, many=True).data,
+                    ),
+                    (
+                        "OrderRetrieveSerializer",
+                        OrderRetrieveSerializer(order).data,
+                    ),
+                ):
+                    self.compare(name, data, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def compare(self, name, data, repeat):
+        rendered = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                renderer.render(data)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            median = timings[len(timings) // 2] * 1000
+
+            tracemalloc.start()
+            output = renderer.render(data)
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            renderer_name = type(renderer).__name__
+            rendered[renderer_name] = output
+            identical = (
+                f"  {output == rendered['JSONRenderer']}"
+                if renderer_name != "JSONRenderer"
+                else ""
+            )
+            self.stdout.write(
+                f"{name:<24} {renderer_name:<15} {median:>10.3f}"
+                f" {peak:>9.1f}{identical}"
+            )
+
+    @staticmethod
+    def create_fixtures(flight_count, ticket_count):
+        source = Airport.objects.create(
+            name="Benchmark source",
+            closest_big_city="Source",
+            country="Benchmark",
+        )
+        destination = Airport.objects.create(
+            name="Benchmark destination",
+            closest_big_city="Destination",
+            country="Benchmark",
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=1000
+        )
+        seats_in_row = 6
+        airplane = Airplane.objects.create(
+            name="Benchmark airplane",
+            rows=ticket_count // seats_in_row + 1,
+            seats_in_row=seats_in_row,
+            airplane_type=AirplaneType.objects.create(name="Benchmark type"),
+        )
+        crew = Crew.objects.bulk_create(
+            Crew(first_name="Benchmark", last_name=f"Crew {index}")
+            for index in range(3)
+        )
+        start = timezone.now() + timedelta(days=365)
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_date=start + timedelta(hours=3 * index),
+                arrival_date=start + timedelta(hours=3 * index + 2),
+            )
+            for index in range(flight_count)
+        )
+        flights[0].crew.set(crew)
+
+        user = get_user_model().objects.create_user(
+            email="benchmark@benchmark.com", password="benchmark"
+        )
+        order = Order.objects.create(user=user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=index // seats_in_row + 1,
+                seat=index % seats_in_row + 1,
+                flight=flights[0],
+                order=order,
+            )
+            for index in range(ticket_count)
+        )
+        return (
+            Flight.objects.select_related("route", "airplane")
+            .filter(airplane=airplane)
+            .with_tickets_available(),
+            Order.objects.prefetch_related("tickets__flight__crew").get(
+                pk=order.pk
+            ),
+        )
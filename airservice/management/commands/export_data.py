@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airservice.export import (
+    DATASETS,
+    EXPORT_FORMATS,
+    dataset_queryset,
+    stream_export,
+)
+from airservice.models import Flight
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream flights, tickets or the manifest of a flight as NDJSON or"
+        " CSV to a file or stdout. Memory use does not depend on the number"
+        " of exported rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument(
+            "--format",
+            choices=sorted(EXPORT_FORMATS),
+            default="ndjson",
+            help="Output format, ndjson by default.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the output with gzip.",
+        )
+        parser.add_argument(
+            "--flight",
+            type=int,
+            help="Flight ID, required for the manifest.",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Output file, stdout by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows fetched per database round trip,"
+                 " EXPORT_CHUNK_SIZE by default.",
+        )
+
+    def handle(self, *args, **options):
+        dataset = options["dataset"]
+        flight_id = options["flight"]
+        if dataset == "manifest":
+            if flight_id is None:
+                raise CommandError("The manifest requires --flight.")
+            if not Flight.objects.filter(id=flight_id).exists():
+                raise CommandError(f"Flight {flight_id} does not exist.")
+
+        blocks = stream_export(
+            dataset_queryset(dataset, flight_id),
+            DATASETS[dataset],
+            options["format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"] is None:
+            output = self.stdout._out
+            if hasattr(output, "buffer"):
+                for block in blocks:
+                    output.buffer.write(block)
+                output.buffer.flush()
+            elif options["gzip"]:
+                raise CommandError("Use --output for gzip output.")
+            else:
+                # Blocks end at row boundaries, so each one decodes alone
+                for block in blocks:
+                    output.write(block.decode())
+            return
+        try:
+            with options["output"].open("wb") as output:
+                for block in blocks:
+                    output.write(block)
+        except OSError as exc:
+            raise CommandError(exc)
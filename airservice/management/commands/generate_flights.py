@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airservice.scheduling import materialize_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Materialize recurring flight schedules into flights for a rolling"
+        " horizon. Already generated dates are not generated again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.FLIGHT_SCHEDULE_HORIZON.days,
+            help="Horizon in days from today.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0:
+            raise CommandError("--days must not be negative.")
+        flights, conflicts = materialize_schedules(
+            timezone.localdate() + timedelta(days=options["days"])
+        )
+        for data, errors in conflicts:
+            self.stderr.write(
+                f"Schedule {data['schedule']},"
+                f" {data['departure_date']:%Y-%m-%d %H:%M}: {errors}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(flights)} flights,"
+                f" skipped {len(conflicts)} conflicting."
+            )
+        )
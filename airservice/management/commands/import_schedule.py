@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ParseError
+
+from airservice.parsers import CSVParser, NDJSONParser
+from airservice.scheduling import find_schedule_errors, import_flights
+from airservice.serializers import FlightImportSerializer
+
+
+PARSERS = {
+    "csv": CSVParser,
+    "jsonl": NDJSONParser,
+    "ndjson": NDJSONParser,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import flights from a CSV or JSONL file. The whole file is"
+        " checked for airplane and crew conflicts before anything is saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=sorted(PARSERS),
+            help="File format, guessed from the extension by default.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only validate the file.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in PARSERS:
+            raise CommandError(
+                f"Unknown format {file_format!r}, use --format."
+            )
+
+        try:
+            with path.open("rb") as stream:
+                rows = PARSERS[file_format]().parse(stream)
+        except (OSError, ParseError) as exc:
+            raise CommandError(exc)
+
+        serializer = FlightImportSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            raise self.schedule_error(serializer.errors)
+        flights_data = serializer.validated_data
+
+        if options["dry_run"]:
+            errors = find_schedule_errors(flights_data)
+            if any(errors):
+                raise self.schedule_error(errors)
+            self.stdout.write(f"{len(flights_data)} flights are valid.")
+            return
+        flights = import_flights(flights_data, self.schedule_error)
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {len(flights)} flights.")
+        )
+
+    def schedule_error(self, errors):
+        """Report per-row errors, numbered from 1 like the conflict
+        messages, and return the error that aborts the import."""
+        if isinstance(errors, str):
+            return CommandError(errors)
+        for index, row_errors in enumerate(errors):
+            if row_errors:
+                self.stderr.write(f"Row {index + 1}: {row_errors}")
+        return CommandError("The schedule was not imported.")
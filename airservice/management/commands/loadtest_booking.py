@@ -0,0 +1,156 @@
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def request_json(url, payload=None, token=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data)
+    request.add_header("Content-Type", "application/json")
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as error:
+        return error.code, None
+
+
+def book(args):
+    """Post one order for a random seat and return (status, seconds)."""
+    base_url, token, flight_id, rows, seats_in_row, seed = args
+    generator = random.Random(seed)
+    payload = {
+        "tickets": [{
+            "flight": flight_id,
+            "row": generator.randint(1, rows),
+            "seat": generator.randint(1, seats_in_row),
+        }]
+    }
+    start = time.perf_counter()
+    try:
+        status, _ = request_json(
+            f"{base_url}/api/airservice/order/", payload, token
+        )
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire parallel bookings for random seats of one flight against a"
+        " running server and report throughput, latency and error rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flight", type=int, help="Flight ID to book.")
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8001",
+            help="Base URL of the running API.",
+        )
+        parser.add_argument(
+            "--email",
+            action="append",
+            required=True,
+            help="User to book as; repeat with --password for more users."
+                 " Requests are spread over the users, so that the per-user"
+                 " throttle is not the bottleneck.",
+        )
+        parser.add_argument("--password", action="append", required=True)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=8,
+            help="Number of parallel client processes.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Total number of booking requests.",
+        )
+
+    def handle(self, *args, **options):
+        base_url = options["url"].rstrip("/")
+        if len(options["email"]) != len(options["password"]):
+            raise CommandError("Give one --password per --email.")
+        tokens = [
+            self.obtain_token(base_url, email, password)
+            for email, password in zip(options["email"], options["password"])
+        ]
+
+        status, seat_map = request_json(
+            f"{base_url}/api/airservice/flights/{options['flight']}/seats/",
+            token=tokens[0],
+        )
+        if status != 200:
+            raise CommandError(f"Could not load the flight (HTTP {status}).")
+
+        jobs = [
+            (
+                base_url,
+                tokens[seed % len(tokens)],
+                options["flight"],
+                seat_map["rows"],
+                seat_map["seats_in_row"],
+                seed,
+            )
+            for seed in range(options["requests"])
+        ]
+        start = time.perf_counter()
+        with Pool(options["processes"]) as pool:
+            results = pool.map(book, jobs)
+        elapsed = time.perf_counter() - start
+
+        statuses = Counter(status for status, _ in results)
+        latencies = sorted(seconds for _, seconds in results)
+        # 409 is the expected answer for a seat that was taken already
+        errors = sum(
+            count for status, count in statuses.items()
+            if not 200 <= status < 300 and status != 409
+        )
+
+        self.stdout.write(f"requests:    {len(results)}")
+        self.stdout.write(f"throughput:  {len(results) / elapsed:.1f} req/s")
+        self.stdout.write(
+            f"latency p50: {self.percentile(latencies, 50) * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            f"latency p99: {self.percentile(latencies, 99) * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            f"error rate:  {errors / len(results):.2%}"
+            " (besides 2xx and 409 seat conflicts)"
+        )
+        if statuses[429]:
+            self.stdout.write(
+                f"throttled:   {statuses[429]} (HTTP 429; add users with"
+                " --email/--password)"
+            )
+        for status, count in sorted(statuses.items()):
+            self.stdout.write(f"  HTTP {status or 'failed'}: {count}")
+
+    @staticmethod
+    def obtain_token(base_url, email, password):
+        status, tokens = request_json(
+            f"{base_url}/api/user/token/",
+            {"email": email, "password": password},
+        )
+        if status != 200:
+            raise CommandError(
+                f"Could not obtain a token for {email} (HTTP {status})."
+            )
+        return tokens["access"]
+
+    @staticmethod
+    def percentile(values, percent):
+        index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+        return values[index]
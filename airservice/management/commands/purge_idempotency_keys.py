@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from airservice.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored Idempotency-Key responses past IDEMPOTENCY_KEY_TTL,"
+        " which are no longer replayed."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.expired().delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys.")
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["airplane", "arrival_date"],
+                name="flight_airplane_arrival_idx"
+            ),
+        ),
+    ]
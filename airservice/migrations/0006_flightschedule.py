@@ -0,0 +1,86 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0005_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlightSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "days_of_week",
+                    models.CharField(
+                        help_text="ISO weekdays of the flight, e.g. '135' for Monday, Wednesday and Friday.",
+                        max_length=7,
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("duration", models.DurationField()),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                (
+                    "generated_until",
+                    models.DateField(
+                        blank=True,
+                        editable=False,
+                        help_text="Last date for which flights were generated.",
+                        null=True,
+                    ),
+                ),
+                (
+                    "airplane",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flight_schedules",
+                        to="airservice.airplane",
+                    ),
+                ),
+                (
+                    "crew",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="flight_schedules",
+                        to="airservice.crew",
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flight_schedules",
+                        to="airservice.route",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("route", "departure_time"),
+            },
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="flights",
+                to="airservice.flightschedule",
+            ),
+        ),
+    ]
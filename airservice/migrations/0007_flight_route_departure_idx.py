@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0006_flightschedule"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["route", "departure_date"], name="flight_route_departure_idx"
+            ),
+        ),
+    ]
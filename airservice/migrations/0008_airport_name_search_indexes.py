@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:02
+
+from django.db import migrations
+
+
+def add_airport_name_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS airport_lower_name_pattern_idx"
+        " ON airservice_airport (LOWER(name) text_pattern_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS airport_lower_name_trgm_idx"
+        " ON airservice_airport USING gin (LOWER(name) gin_trgm_ops)"
+    )
+
+
+def remove_airport_name_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS airport_lower_name_trgm_idx")
+    schema_editor.execute(
+        "DROP INDEX IF EXISTS airport_lower_name_pattern_idx"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0007_flight_route_departure_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            add_airport_name_search_indexes,
+            remove_airport_name_search_indexes,
+        ),
+    ]
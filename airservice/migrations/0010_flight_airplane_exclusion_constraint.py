@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:12
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+
+CONSTRAINT_NAME = "exclude_overlapping_airplane_flights"
+
+
+def drop_airplane_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE airservice_flight"
+        f" DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}"
+    )
+
+
+def add_airplane_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    if not settings.FLIGHT_OVERLAP_CONSTRAINT:
+        # Earlier versions of 0003 created the constraint unconditionally
+        drop_airplane_exclusion_constraint(apps, schema_editor)
+        return
+
+    Flight = apps.get_model("airservice", "Flight")
+    overlapping = Flight.objects.filter(
+        airplane=OuterRef("airplane"),
+        departure_date__lt=OuterRef("arrival_date"),
+        arrival_date__gt=OuterRef("departure_date"),
+    ).exclude(pk=OuterRef("pk"))
+    flight_ids = list(
+        Flight.objects.filter(Exists(overlapping))
+        .order_by("id")
+        .values_list("id", flat=True)[:20]
+    )
+    if flight_ids:
+        raise RuntimeError(
+            "Cannot add the airplane exclusion constraint: flights"
+            f" {', '.join(map(str, flight_ids))} overlap other flights of"
+            " their airplane. Reschedule them, or migrate with"
+            " FLIGHT_OVERLAP_CONSTRAINT turned off."
+        )
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE airservice_flight"
+        f" DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}"
+    )
+    schema_editor.execute(
+        "ALTER TABLE airservice_flight"
+        f" ADD CONSTRAINT {CONSTRAINT_NAME}"
+        " EXCLUDE USING gist ("
+        "airplane_id WITH =,"
+        " tstzrange(departure_date, arrival_date) WITH &&"
+        ")"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0009_reference_data_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            add_airplane_exclusion_constraint,
+            drop_airplane_exclusion_constraint,
+        ),
+    ]
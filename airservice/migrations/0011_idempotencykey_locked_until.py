@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0010_flight_airplane_exclusion_constraint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="locked_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
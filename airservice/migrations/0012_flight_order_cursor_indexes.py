@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airservice", "0011_idempotencykey_locked_until"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["departure_date", "arrival_date", "id"],
+                name="flight_departure_arrival_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at", "id"], name="order_user_created_idx"
+            ),
+        ),
+    ]
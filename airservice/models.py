@@ -1,5 +1,10 @@
-from django.db import models
+from datetime import datetime, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Func, OuterRef, Q, Subquery
 from django.db.models.functions import Lower
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from airport_service import settings
@@ -9,6 +14,7 @@ class Airport(models.Model):
     name = models.CharField(max_length=100, unique=True)
     closest_big_city = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ("name",)
@@ -32,6 +38,7 @@ class Route(models.Model):
     )
     distance = models.IntegerField()
     display_name = models.CharField(max_length=255, editable=False, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         constraints = [
@@ -66,6 +73,7 @@ class Route(models.Model):
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.name}"
@@ -78,10 +86,28 @@ class Airplane(models.Model):
     airplane_type = models.ForeignKey(
         AirplaneType, on_delete=models.CASCADE, related_name="airplanes"
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ("name",)
 
+    @staticmethod
+    def validate_cabin_size(airplane_id, rows, seats_in_row, error_to_raise):
+        """Refuse to shrink the cabin below seats that are sold or held
+        on the airplane's flights."""
+        outside = Q(row__gt=rows) | Q(seat__gt=seats_in_row)
+        if (
+            Ticket.objects.filter(outside, flight__airplane_id=airplane_id)
+            .exists()
+            or SeatHold.objects.active()
+            .filter(outside, flight__airplane_id=airplane_id)
+            .exists()
+        ):
+            raise error_to_raise(
+                "Seats outside the new cabin size are already sold or"
+                " held on flights of this airplane."
+            )
+
     def __str__(self):
         return f"{self.name}"
 
@@ -102,6 +128,105 @@ class Crew(models.Model):
         return self.full_name
 
 
+class FlightSchedule(models.Model):
+    """Weekly recurring flight that is materialized into Flight rows."""
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="flight_schedules"
+    )
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, related_name="flight_schedules"
+    )
+    crew = models.ManyToManyField(
+        Crew, related_name="flight_schedules", blank=True
+    )
+    days_of_week = models.CharField(
+        max_length=7,
+        help_text="ISO weekdays of the flight, e.g. '135'"
+                  " for Monday, Wednesday and Friday.",
+    )
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    generated_until = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Last date for which flights were generated.",
+    )
+
+    class Meta:
+        ordering = ("route", "departure_time")
+
+    @staticmethod
+    def validate_schedule(days_of_week, valid_from, valid_until,
+                          error_to_raise):
+        errors = {}
+        if (
+            not days_of_week
+            or any(day not in "1234567" for day in days_of_week)
+            or len(set(days_of_week)) != len(days_of_week)
+        ):
+            errors["days_of_week"] = (
+                "Days of week must be distinct digits from 1 (Monday)"
+                " to 7 (Sunday)."
+            )
+        if valid_from > valid_until:
+            errors["valid_until"] = "Validity must not end before it starts."
+        if errors:
+            raise error_to_raise(errors)
+
+    def clean(self):
+        FlightSchedule.validate_schedule(
+            self.days_of_week,
+            self.valid_from,
+            self.valid_until,
+            ValidationError,
+        )
+
+    def occurrences(self, start_date, end_date):
+        """Yield (departure, arrival) datetimes between the two dates,
+        both inclusive and clipped to the validity window."""
+        day = max(start_date, self.valid_from)
+        end_date = min(end_date, self.valid_until)
+        weekdays = {int(weekday) for weekday in self.days_of_week}
+        while day <= end_date:
+            if day.isoweekday() in weekdays:
+                departure_date = timezone.make_aware(
+                    datetime.combine(day, self.departure_time)
+                )
+                yield departure_date, departure_date + self.duration
+            day += timedelta(days=1)
+
+    def __str__(self):
+        return (
+            f"{self.route}, days {self.days_of_week}"
+            f" at {self.departure_time:%H:%M}"
+        )
+
+
+class FlightQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        # A correlated count instead of JOIN + GROUP BY keeps the ordered
+        # index scan of the flight list, and LIMIT applies before the
+        # tickets of each flight are counted
+        sold = (
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .annotate(count=Func(F("pk"), function="COUNT"))
+            .values("count")
+        )
+        return self.annotate(
+            tickets_available=(
+                F("airplane__rows") * F("airplane__seats_in_row")
+                - Subquery(sold, output_field=models.IntegerField())
+            )
+        )
+
+
 class Flight(models.Model):
     route = models.ForeignKey(
         Route,
@@ -114,9 +239,80 @@ class Flight(models.Model):
     departure_date = models.DateTimeField()
     arrival_date = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="flights")
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights"
+    )
+
+    objects = FlightQuerySet.as_manager()
+
+    # Optional PostgreSQL constraint, see FLIGHT_OVERLAP_CONSTRAINT
+    AIRPLANE_OVERLAP_CONSTRAINT = "exclude_overlapping_airplane_flights"
 
     class Meta:
         ordering = ("departure_date", "arrival_date")
+        indexes = [
+            models.Index(
+                fields=["airplane", "arrival_date"],
+                name="flight_airplane_arrival_idx",
+            ),
+            models.Index(
+                fields=["route", "departure_date"],
+                name="flight_route_departure_idx",
+            ),
+            # FlightCursorPagination ordering
+            models.Index(
+                fields=["departure_date", "arrival_date", "id"],
+                name="flight_departure_arrival_idx",
+            ),
+        ]
+
+    @staticmethod
+    def overlapping(departure_date, arrival_date, current_flight_id=None):
+        """Flights whose time window intersects [departure, arrival)."""
+        queryset = Flight.objects.filter(
+            arrival_date__gt=departure_date,
+            departure_date__lt=arrival_date,
+        )
+        if current_flight_id is not None:
+            queryset = queryset.exclude(id=current_flight_id)
+        return queryset
+
+    @staticmethod
+    def is_airplane_overlap_error(error):
+        """Whether an IntegrityError comes from the airplane exclusion
+        constraint, i.e. an overlap that slipped past validation."""
+        return Flight.AIRPLANE_OVERLAP_CONSTRAINT in str(error)
+
+    @staticmethod
+    def find_crew_conflicts(
+        crew_list, departure_date, arrival_date, current_flight_id=None
+    ):
+        """Return (crew member, flight) pairs for every overlapping
+        assignment of the given crew, using one query on the M2M table."""
+        crew_by_id = {crew_member.id: crew_member for crew_member in crew_list}
+        if not crew_by_id:
+            return []
+
+        assignments = (
+            Flight.crew.through.objects.filter(
+                crew_id__in=crew_by_id,
+                flight__arrival_date__gt=departure_date,
+                flight__departure_date__lt=arrival_date,
+            )
+            .select_related("flight__route")
+            .order_by("crew_id", "flight__departure_date")
+        )
+        if current_flight_id is not None:
+            assignments = assignments.exclude(flight_id=current_flight_id)
+
+        return [
+            (crew_by_id[assignment.crew_id], assignment.flight)
+            for assignment in assignments
+        ]
 
     @staticmethod
     def validate_airplane_and_crew(
@@ -128,34 +324,27 @@ class Flight(models.Model):
         crew_list=None,
     ):
         errors = {}
+        overlapping = Flight.overlapping(
+            departure_date, arrival_date, current_flight_id
+        )
 
-        for flight in airplane.flights.all():
-            if flight.id == current_flight_id:
-                continue
-            if (
-                arrival_date > flight.departure_date
-                and departure_date < flight.arrival_date
-            ):
-                errors["airplane"] = (
-                    f"Airplane {airplane.name} is already"
-                    f" assigned to another flight at this time."
-                )
-                break
+        if overlapping.filter(airplane=airplane).exists():
+            errors["airplane"] = (
+                f"Airplane {airplane.name} is already"
+                f" assigned to another flight at this time."
+            )
 
         if crew_list is not None:
-            for crew_member in crew_list:
-                for flight in crew_member.flights.all():
-                    if flight.id == current_flight_id:
-                        continue
-                    if (
-                        arrival_date > flight.departure_date
-                        and departure_date < flight.arrival_date
-                    ):
-                        errors["crew"] = (
-                            f"Crew member {crew_member.full_name} is already"
-                            f" assigned to another flight at this time."
-                        )
-                        break
+            conflicts = Flight.find_crew_conflicts(
+                crew_list, departure_date, arrival_date, current_flight_id
+            )
+            if conflicts:
+                errors["crew"] = [
+                    f"Crew member {crew_member.full_name} is already"
+                    f" assigned to flight {flight.id} ({flight})"
+                    f" at this time."
+                    for crew_member, flight in conflicts
+                ]
 
         if errors:
             raise error_to_raise(errors)
@@ -196,6 +385,13 @@ class Order(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            # OrderCursorPagination ordering within a user's orders
+            models.Index(
+                fields=["user", "-created_at", "id"],
+                name="order_user_created_idx",
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -234,6 +430,51 @@ class Ticket(models.Model):
         if errors:
             raise error_to_raise(errors)
 
+    @staticmethod
+    def find_place_conflicts(tickets, user=None):
+        """Return one error dict per ticket (empty when the place is free),
+        checking all places against the database in a single query.
+
+        When ``user`` is given, places under an active hold of another
+        user are reported as well (one more query).
+        """
+        places = {
+            "flight_id__in": {ticket.flight_id for ticket in tickets},
+            "row__in": {ticket.row for ticket in tickets},
+            "seat__in": {ticket.seat for ticket in tickets},
+        }
+        taken = set(
+            Ticket.objects.filter(**places).values_list(
+                "flight_id", "row", "seat"
+            )
+        )
+        held = set()
+        if user is not None:
+            held = set(
+                SeatHold.objects.active()
+                .filter(**places)
+                .exclude(user=user)
+                .values_list("flight_id", "row", "seat")
+            )
+
+        errors = []
+        for ticket in tickets:
+            place = (ticket.flight_id, ticket.row, ticket.seat)
+            if place in taken:
+                errors.append({
+                    "seat": f"Seat {ticket.seat} in row {ticket.row}"
+                            f" is already taken on flight {ticket.flight_id}."
+                })
+            elif place in held:
+                errors.append({
+                    "seat": f"Seat {ticket.seat} in row {ticket.row}"
+                            f" is held by another customer"
+                            f" on flight {ticket.flight_id}."
+                })
+            else:
+                errors.append({})
+        return errors
+
     def clean(self):
         Ticket.validate_place(
             self.row,
@@ -257,3 +498,115 @@ class Ticket(models.Model):
 
     def __str__(self):
         return f"{self.flight}, {self.row}: {self.seat}"
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["row", "seat", "flight"], name="unique_seat_hold"
+            )
+        ]
+        ordering = ("expires_at",)
+
+    @staticmethod
+    def place(flight, row, seat, user, error_to_raise):
+        """Hold a seat for ``user`` for SEAT_HOLD_TTL, extending the user's
+        own hold. Expired holds of other users are dropped lazily."""
+        now = timezone.now()
+        with transaction.atomic():
+            if Ticket.objects.filter(
+                flight=flight, row=row, seat=seat
+            ).exists():
+                raise error_to_raise(
+                    f"Seat {seat} in row {row} is already taken."
+                )
+            SeatHold.objects.filter(
+                Q(expires_at__lte=now) | Q(user=user),
+                flight=flight,
+                row=row,
+                seat=seat,
+            ).delete()
+            try:
+                with transaction.atomic():
+                    return SeatHold.objects.create(
+                        flight=flight,
+                        row=row,
+                        seat=seat,
+                        user=user,
+                        expires_at=now + settings.SEAT_HOLD_TTL,
+                    )
+            except IntegrityError:
+                raise error_to_raise(
+                    f"Seat {seat} in row {row} is held by another customer."
+                )
+
+    def __str__(self):
+        return (
+            f"{self.flight}, {self.row}: {self.seat}"
+            f" held until {self.expires_at}"
+        )
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a request made with an ``Idempotency-Key``
+    header, replayed to retries of the same user with the same key."""
+
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    # Lease of the request processing the key; once it runs out without
+    # a stored response, e.g. after the worker was killed, a retry
+    # takes over
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_user_idempotency_key"
+            )
+        ]
+
+    @property
+    def is_completed(self):
+        return self.status_code is not None
+
+    def __str__(self):
+        return f"{self.user}: {self.key}"
@@ -0,0 +1,292 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique composite ordering.
+
+    The cursor holds the ordering values of the last row of the page, and
+    the next page starts with a row-value comparison against them, so
+    every page costs the same index range scan and no COUNT is run.
+    ``ordering`` must end with a unique, non-null field such as ``id``;
+    fields prefixed with "-" are descending.
+    """
+
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.reverse_field(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    @staticmethod
+    def reverse_field(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def after(ordering, position):
+        """Q of rows following ``position`` in ``ordering``, i.e. the
+        row-value comparison expanded into (a > x) OR (a = x AND b > y)...
+
+        The OR is ANDed with a >= x, a bound on the leading column alone,
+        so the database can range scan the ordering index from the cursor
+        instead of reading and sorting every row of the OR branches.
+        """
+        first = ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        bound = Q(**{f"{first.lstrip('-')}__{lookup}": position[0]})
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {
+                previous.lstrip("-"): value
+                for previous, value in zip(ordering[:index], position)
+            }
+            condition |= Q(**equal, **{f"{name}__{lookup}": position[index]})
+        return bound & condition
+
+    def position(self, row):
+        # isoformat() keeps the microseconds that DjangoJSONEncoder drops
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            values = [row[name] for name in names]
+        else:
+            values = [getattr(row, name) for name in names]
+        return [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in values
+        ]
+
+    def encode_cursor(self, row, reverse):
+        data = json.dumps({"p": self.position(row), "r": reverse})
+        cursor = urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(cursor.encode()))
+            values = data["p"]
+            reverse = bool(data["r"])
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (
+            BinasciiError,
+            DjangoValidationError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class FlightCursorPagination(KeysetPagination):
+    ordering = ("departure_date", "arrival_date", "id")
+
+
+class OrderCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "id")
+
+
+class CountFreePagination(LimitOffsetPagination):
+    """Limit/offset pagination without the COUNT(*) query.
+
+    One extra row is fetched to tell whether a next page exists, reported
+    as ``has_next``; ``count`` comes from ``get_count``, which returns
+    None here.
+    """
+
+    template = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.count = self.get_count(queryset)
+        return rows[:self.limit]
+
+    def get_count(self, queryset):
+        return None
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "has_next": self.has_next,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"] = ["has_next", "results"]
+        response_schema["properties"]["count"]["nullable"] = True
+        response_schema["properties"]["has_next"] = {"type": "boolean"}
+        return response_schema
+
+
+class EstimatedCountPagination(CountFreePagination):
+    """Count-free pagination reporting an approximate ``count``.
+
+    On PostgreSQL an unfiltered table is estimated from the planner
+    statistics in ``pg_class.reltuples``. Smaller tables, filtered
+    querysets and other backends get an exact count cached for
+    ``count_cache_timeout`` seconds.
+    """
+
+    estimate_threshold = 10000
+    count_cache_timeout = 60
+
+    def get_count(self, queryset):
+        if not queryset.query.where:
+            estimate = self.get_table_estimate(queryset)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+
+        query_hash = hashlib.sha256(str(queryset.query).encode()).hexdigest()
+        key = f"airservice:count:{query_hash}"
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    @staticmethod
+    def get_table_estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class"
+                " WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,60 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser decoding with orjson; the stock JSONParser when orjson
+    is not installed or the body is not UTF-8."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class CSVParser(BaseParser):
+    """Parse a CSV body with a header row into a list of dicts."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            reader = csv.DictReader(codecs.iterdecode(stream, encoding))
+            return list(reader)
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f"CSV parse error - {exc}")
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list of objects."""
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            return [
+                json.loads(line)
+                for line in codecs.iterdecode(stream, encoding)
+                if line.strip()
+            ]
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f"NDJSON parse error - {exc}")
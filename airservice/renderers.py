@@ -0,0 +1,39 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer encoding with orjson, which serializes dicts, lists,
+    strings and datetimes natively and far faster than the stdlib.
+
+    Output matches the compact, unicode JSONRenderer for serializer data.
+    Types orjson does not know (Decimal, lazy strings, querysets...) go
+    through DRF's JSONEncoder. orjson only indents by two spaces, so
+    other indents, like the stock JSONRenderer without orjson
+    installed, are rendered by JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=option
+        )
+        # Escape the line separators JavaScript does not accept in
+        # strings, like JSONRenderer
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
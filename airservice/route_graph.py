@@ -0,0 +1,111 @@
+from array import array
+
+from airservice.cache import VersionedValue
+from airservice.models import Airport, Route
+
+
+VERSION_NAME = "route_graph"
+
+
+class RouteGraph:
+    """Immutable route graph in compressed sparse row (CSR) form.
+
+    Airports get dense indexes; the routes leaving airport ``i`` are the
+    slice ``out_offsets[i]:out_offsets[i + 1]`` of the ``out_*`` arrays and
+    the routes arriving there the same slice of the ``in_*`` arrays. Both
+    are sorted by the name of the other airport, like the default Route
+    ordering.
+    """
+
+    def __init__(self, airports, routes):
+        airports = list(airports)
+        self.airport_ids = array("q", (pk for pk, _ in airports))
+        self.airport_names = dict(airports)
+        self.index = {
+            airport_id: index
+            for index, airport_id in enumerate(self.airport_ids)
+        }
+        routes = list(routes)
+        (
+            self.out_offsets,
+            self.out_airports,
+            self.out_routes,
+            self.out_distances,
+        ) = self._compress(routes, source=1, target=2)
+        (
+            self.in_offsets,
+            self.in_airports,
+            self.in_routes,
+            self.in_distances,
+        ) = self._compress(routes, source=2, target=1)
+
+    @classmethod
+    def build(cls):
+        return cls(
+            Airport.objects.order_by("name").values_list("id", "name"),
+            Route.objects.order_by().values_list(
+                "id", "source_id", "destination_id", "distance"
+            ),
+        )
+
+    def _compress(self, routes, source, target):
+        routes = sorted(
+            routes,
+            key=lambda route: (
+                self.index[route[source]],
+                self.airport_names[route[target]],
+            ),
+        )
+        offsets = array("q", [0] * (len(self.airport_ids) + 1))
+        for route in routes:
+            offsets[self.index[route[source]] + 1] += 1
+        for index in range(len(self.airport_ids)):
+            offsets[index + 1] += offsets[index]
+        return (
+            offsets,
+            array("q", (route[target] for route in routes)),
+            array("q", (route[0] for route in routes)),
+            array("q", (route[3] for route in routes)),
+        )
+
+    def _neighbours(self, airport_id, offsets, airports, routes, distances):
+        index = self.index.get(airport_id)
+        if index is None:
+            return
+        for position in range(offsets[index], offsets[index + 1]):
+            yield airports[position], routes[position], distances[position]
+
+    def routes_from(self, airport_id):
+        """Yield (destination ID, route ID, distance) of departing routes."""
+        return self._neighbours(
+            airport_id,
+            self.out_offsets,
+            self.out_airports,
+            self.out_routes,
+            self.out_distances,
+        )
+
+    def routes_to(self, airport_id):
+        """Yield (source ID, route ID, distance) of arriving routes."""
+        return self._neighbours(
+            airport_id,
+            self.in_offsets,
+            self.in_airports,
+            self.in_routes,
+            self.in_distances,
+        )
+
+
+_route_graph = VersionedValue(
+    VERSION_NAME, RouteGraph.build, (Airport, Route)
+)
+
+
+def get_route_graph(change_stamps=None):
+    """Return the process-wide route graph, rebuilding it only after the
+    version stamp was bumped by a Route or Airport change.
+
+    ``change_stamps`` of Airport and Route already read for the request
+    spare the lookup its own query with a process-local cache.
+    """
+    return _route_graph.get(change_stamps)
@@ -0,0 +1,258 @@
+from datetime import timedelta
+from heapq import heappop, heappush
+from operator import itemgetter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from airservice.cache import bump_model_versions
+from airservice.models import (
+    Route,
+    Airplane,
+    Crew,
+    Flight,
+    FlightSchedule,
+)
+
+
+def sweep_overlaps(intervals):
+    """Yield (earlier, later) pairs of overlapping intervals.
+
+    ``intervals`` are ``(resource, start, end, flight_id)`` tuples sorted by
+    ``(resource, start)``. The intervals of the current resource that have
+    not ended yet are kept in a heap keyed by end; each interval drops the
+    ones ending by its start and is paired with every one still active,
+    so every overlapping pair is reported exactly once, in start order.
+    """
+    active = []
+    resource = None
+    for position, interval in enumerate(intervals):
+        if interval[0] != resource:
+            resource = interval[0]
+            active = []
+        start, end = interval[1], interval[2]
+        while active and active[0][0] <= start:
+            heappop(active)
+        for _, _, earlier in sorted(active, key=itemgetter(1)):
+            yield earlier, interval
+        heappush(active, (end, position, interval))
+
+
+def find_schedule_errors(flights_data):
+    """Validate new flights as one batch and return one error dict per
+    flight (empty when valid).
+
+    ``flights_data`` are dicts with ``route``, ``airplane`` and ``crew``
+    IDs and ``departure_date``/``arrival_date``. Unknown references are
+    resolved with one query per model, and overlaps with each other and
+    with stored flights are found with one query per resource type and a
+    single sort-and-sweep pass.
+    """
+    errors = [{} for _ in flights_data]
+    if not flights_data:
+        return errors
+
+    known = {
+        "route": set(Route.objects.filter(
+            id__in={data["route"] for data in flights_data}
+        ).values_list("id", flat=True)),
+        "airplane": set(Airplane.objects.filter(
+            id__in={data["airplane"] for data in flights_data}
+        ).values_list("id", flat=True)),
+        "crew": set(Crew.objects.filter(
+            id__in={crew for data in flights_data for crew in data["crew"]}
+        ).values_list("id", flat=True)),
+    }
+    for index, data in enumerate(flights_data):
+        for field in ("route", "airplane"):
+            if data[field] not in known[field]:
+                errors[index][field] = f"Unknown {field} {data[field]}."
+        unknown_crew = [
+            crew for crew in data["crew"] if crew not in known["crew"]
+        ]
+        if unknown_crew:
+            errors[index]["crew"] = [
+                f"Unknown crew member {crew}." for crew in unknown_crew
+            ]
+    if any(errors):
+        return errors
+
+    window_start = min(data["departure_date"] for data in flights_data)
+    window_end = max(data["arrival_date"] for data in flights_data)
+    stored = Flight.overlapping(window_start, window_end)
+
+    airplane_intervals = [
+        (data["airplane"], data["departure_date"], data["arrival_date"],
+         (None, index))
+        for index, data in enumerate(flights_data)
+    ]
+    airplane_intervals.extend(
+        (airplane_id, departure_date, arrival_date, (flight_id, None))
+        for airplane_id, departure_date, arrival_date, flight_id
+        in stored.filter(
+            airplane_id__in={data["airplane"] for data in flights_data}
+        ).values_list("airplane_id", "departure_date", "arrival_date", "id")
+    )
+    crew_intervals = [
+        (crew, data["departure_date"], data["arrival_date"], (None, index))
+        for index, data in enumerate(flights_data)
+        for crew in data["crew"]
+    ]
+    crew_intervals.extend(
+        (crew_id, departure_date, arrival_date, (flight_id, None))
+        for crew_id, departure_date, arrival_date, flight_id
+        in Flight.crew.through.objects.filter(
+            crew_id__in=known["crew"],
+            flight__in=stored,
+        ).values_list(
+            "crew_id",
+            "flight__departure_date",
+            "flight__arrival_date",
+            "flight_id",
+        )
+    )
+
+    for field, label, intervals in (
+        ("airplane", "Airplane", airplane_intervals),
+        ("crew", "Crew member", crew_intervals),
+    ):
+        intervals.sort(key=lambda interval: interval[:2])
+        for earlier, later in sweep_overlaps(intervals):
+            for interval, other in ((earlier, later), (later, earlier)):
+                index = interval[3][1]
+                if index is None:
+                    continue
+                flight_id, other_index = other[3]
+                clash = (
+                    f"flight {flight_id}" if flight_id is not None
+                    else f"imported flight #{other_index + 1}"
+                )
+                errors[index].setdefault(field, []).append(
+                    f"{label} {interval[0]} is already assigned to"
+                    f" {clash} at this time."
+                )
+    return errors
+
+
+def create_flights(flights_data, batch_size=1000):
+    """Insert validated flights and their crew with two bulk inserts."""
+    flights = Flight.objects.bulk_create(
+        [
+            Flight(
+                route_id=data["route"],
+                airplane_id=data["airplane"],
+                departure_date=data["departure_date"],
+                arrival_date=data["arrival_date"],
+                schedule_id=data.get("schedule"),
+            )
+            for data in flights_data
+        ],
+        batch_size=batch_size,
+    )
+    Flight.crew.through.objects.bulk_create(
+        [
+            Flight.crew.through(flight_id=flight.id, crew_id=crew)
+            for flight, data in zip(flights, flights_data)
+            for crew in data["crew"]
+        ],
+        batch_size=batch_size,
+    )
+    bump_model_versions(Flight, Crew)
+    return flights
+
+
+def import_flights(flights_data, error_to_raise):
+    """Validate and insert a batch of flights atomically."""
+    try:
+        with transaction.atomic():
+            errors = find_schedule_errors(flights_data)
+            if any(errors):
+                raise error_to_raise(errors)
+            return create_flights(flights_data)
+    except IntegrityError as error:
+        if not Flight.is_airplane_overlap_error(error):
+            raise
+        raise error_to_raise(
+            "A concurrent write assigned an airplane of the batch to"
+            " another flight at the same time."
+        )
+
+
+def materialize_schedules(until, schedules=None):
+    """Generate flights of recurring schedules up to the ``until`` date.
+
+    Generation is incremental: each schedule continues after its
+    ``generated_until`` date, never with departures that are already
+    past, and a shorter horizon never moves ``generated_until``
+    backwards. All new instances are conflict-checked as one batch;
+    conflicting ones are skipped and returned with their errors as
+    ``(flight data, errors)`` pairs. ``generated_until`` then stops
+    before the first skipped date, so the next run retries it; flights
+    already generated after it are not generated again.
+    """
+    if schedules is None:
+        schedules = FlightSchedule.objects.all()
+    now = timezone.now()
+    schedules = list(
+        schedules.filter(valid_until__gte=timezone.localdate(now))
+        .prefetch_related("crew")
+    )
+    generated = set(
+        Flight.objects.filter(
+            schedule__in=schedules, departure_date__gt=now
+        ).values_list("schedule_id", "departure_date")
+    )
+
+    flights_data = []
+    for schedule in schedules:
+        start_date = timezone.localdate(now)
+        if schedule.generated_until is not None:
+            start_date = max(
+                start_date, schedule.generated_until + timedelta(days=1)
+            )
+        crew = [crew_member.id for crew_member in schedule.crew.all()]
+        flights_data.extend(
+            {
+                "route": schedule.route_id,
+                "airplane": schedule.airplane_id,
+                "departure_date": departure_date,
+                "arrival_date": arrival_date,
+                "crew": crew,
+                "schedule": schedule.id,
+            }
+            for departure_date, arrival_date
+            in schedule.occurrences(start_date, until)
+            if departure_date > now
+            and (schedule.id, departure_date) not in generated
+        )
+
+    with transaction.atomic():
+        errors = find_schedule_errors(flights_data)
+        flights = create_flights([
+            data for data, error in zip(flights_data, errors) if not error
+        ])
+        first_skipped = {}
+        for data, error in zip(flights_data, errors):
+            if error:
+                first_skipped.setdefault(
+                    data["schedule"],
+                    timezone.localdate(data["departure_date"]),
+                )
+        for schedule in schedules:
+            generated_until = min(until, schedule.valid_until)
+            if schedule.id in first_skipped:
+                generated_until = min(
+                    generated_until,
+                    first_skipped[schedule.id] - timedelta(days=1),
+                )
+            if schedule.generated_until is not None:
+                generated_until = max(
+                    schedule.generated_until, generated_until
+                )
+            schedule.generated_until = generated_until
+        FlightSchedule.objects.bulk_update(schedules, ["generated_until"])
+
+    conflicts = [
+        (data, error) for data, error in zip(flights_data, errors) if error
+    ]
+    return flights, conflicts
@@ -0,0 +1,21 @@
+from drf_spectacular.openapi import AutoSchema
+from drf_spectacular.utils import OpenApiParameter
+
+
+class SparseFieldsetAutoSchema(AutoSchema):
+    """Document the ``fields`` parameter of SparseFieldsetMixin views."""
+
+    def get_override_parameters(self):
+        parameters = super().get_override_parameters()
+        action = getattr(self.view, "action", None)
+        if action in getattr(self.view, "sparse_fieldset_actions", ()):
+            parameters = [
+                *parameters,
+                OpenApiParameter(
+                    "fields",
+                    str,
+                    description="Comma-separated fields to return;"
+                                " all fields by default.",
+                ),
+            ]
+        return parameters
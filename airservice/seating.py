@@ -0,0 +1,153 @@
+import base64
+
+from airservice.models import Ticket, SeatHold
+
+
+class SeatMap:
+    """Occupancy bitmap of an airplane cabin.
+
+    Seat ``(row, seat)`` maps to bit ``(row - 1) * seats_in_row + seat - 1``,
+    most significant bit first within each byte; a set bit is occupied.
+    Places outside the cabin, e.g. tickets sold before the airplane was
+    made smaller, are ignored.
+    """
+
+    def __init__(self, rows, seats_in_row, occupied=()):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self.size = rows * seats_in_row
+        self.bits = bytearray((self.size + 7) // 8)
+        self.user_holds = []
+        for row, seat in occupied:
+            self.occupy(row, seat)
+
+    @classmethod
+    def for_flight(cls, flight, user=None):
+        """Build the map of sold and actively held seats in one query.
+
+        Seats held by ``user`` are left free for their own order and
+        listed in ``user_holds``, read with a second query.
+        """
+        airplane = flight.airplane
+        sold = (
+            Ticket.objects.filter(flight=flight)
+            .order_by()
+            .values_list("row", "seat")
+        )
+        held = (
+            SeatHold.objects.active()
+            .filter(flight=flight)
+            .order_by()
+            .values_list("row", "seat")
+        )
+        if user is not None:
+            held = held.exclude(user=user)
+        seat_map = cls(airplane.rows, airplane.seats_in_row, sold.union(held))
+        if user is not None:
+            seat_map.user_holds = list(
+                SeatHold.objects.active()
+                .filter(flight=flight, user=user)
+                .order_by("row", "seat")
+                .values_list("row", "seat")
+            )
+        return seat_map
+
+    def index(self, row, seat):
+        return (row - 1) * self.seats_in_row + seat - 1
+
+    def contains(self, row, seat):
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def occupy(self, row, seat):
+        if not self.contains(row, seat):
+            return
+        index = self.index(row, seat)
+        self.bits[index >> 3] |= 0x80 >> (index & 7)
+
+    def is_occupied(self, row, seat):
+        if not self.contains(row, seat):
+            return False
+        index = self.index(row, seat)
+        return bool(self.bits[index >> 3] & (0x80 >> (index & 7)))
+
+    def free_places(self):
+        """Yield free (row, seat) places in row-major order,
+        skipping fully occupied bytes of the bitmap."""
+        for byte_index, byte in enumerate(self.bits):
+            if byte == 0xFF:
+                continue
+            for bit in range(8):
+                index = byte_index * 8 + bit
+                if index >= self.size:
+                    return
+                if not byte & (0x80 >> bit):
+                    yield divmod(index, self.seats_in_row)
+
+    def find_free(self, count, together=False, preferred=()):
+        """Return ``count`` free places, or None when there are not enough.
+
+        With ``together`` the places are adjacent: within one row when the
+        group fits into a row, otherwise a contiguous row-major block.
+        Free ``preferred`` places, e.g. the seats the customer holds, are
+        picked first.
+        """
+        preferred = sorted(
+            place for place in set(preferred)
+            if self.contains(*place) and not self.is_occupied(*place)
+        )
+        places = [(row + 1, seat + 1) for row, seat in self.free_places()]
+        if not together:
+            picked = set(preferred)
+            places = preferred + [
+                place for place in places if place not in picked
+            ]
+            return places[:count] if len(places) >= count else None
+        return (
+            self.find_adjacent(preferred, count)
+            or self.find_adjacent(places, count)
+        )
+
+    def find_adjacent(self, places, count):
+        """First run of ``count`` adjacent places among the sorted
+        ``places``, or None."""
+        run = []
+        for row, seat in places:
+            if run:
+                last_row, last_seat = run[-1]
+                contiguous = (
+                    (row, seat - 1) == (last_row, last_seat)
+                    if count <= self.seats_in_row
+                    else self.index(row, seat)
+                    == self.index(last_row, last_seat) + 1
+                )
+                if not contiguous:
+                    run = []
+            run.append((row, seat))
+            if len(run) == count:
+                return run
+        return None
+
+    @property
+    def occupied_count(self):
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+    @property
+    def available_count(self):
+        return self.size - self.occupied_count
+
+    def to_packed(self):
+        return base64.b64encode(bytes(self.bits)).decode("ascii")
+
+    def to_runs(self):
+        """Run lengths of alternating free and occupied seats,
+        always starting with a (possibly empty) free run."""
+        runs = []
+        current, length = False, 0
+        for index in range(self.size):
+            occupied = bool(self.bits[index >> 3] & (0x80 >> (index & 7)))
+            if occupied != current:
+                runs.append(length)
+                current, length = occupied, 0
+            length += 1
+        runs.append(length)
+        return runs
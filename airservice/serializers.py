@@ -1,6 +1,13 @@
-from django.db import transaction
+import operator
+import time
+from functools import reduce
+
+from django.db import transaction, IntegrityError, OperationalError
+from django.db.models import Q
 from rest_framework import serializers
 
+from airservice.cache import bump_model_versions
+from airservice.exceptions import SeatConflict
 from airservice.models import (
     Airport,
     Route,
@@ -8,9 +15,81 @@ from airservice.models import (
     AirplaneType,
     Crew,
     Flight,
+    FlightSchedule,
     Ticket,
     Order,
+    SeatHold,
 )
+from airservice.seating import SeatMap
+
+
+class ValuesSerializerMixin:
+    """Fast path for read-only list serializers of plain columns.
+
+    Rows are fetched with values() on exactly the needed columns and
+    turned into the same dicts the serializer would produce, without
+    model instances or per-row field lookups. Sources are derived from
+    the fields ("airplane.name" becomes "airplane__name");
+    ``values_sources`` overrides them for fields such as
+    StringRelatedField.
+    """
+
+    values_sources = {}
+    converted_fields = (
+        serializers.DateTimeField,
+        serializers.DateField,
+        serializers.TimeField,
+        serializers.DurationField,
+        serializers.DecimalField,
+    )
+
+    @classmethod
+    def get_values_fields(cls):
+        """(name, values() source, converter or None) per output field."""
+        if "_values_fields" not in cls.__dict__:
+            cls._values_fields = [
+                (
+                    name,
+                    cls.values_sources.get(
+                        name, field.source.replace(".", "__")
+                    ),
+                    field.to_representation
+                    if isinstance(field, cls.converted_fields)
+                    else None,
+                )
+                for name, field in cls().fields.items()
+                if not field.write_only
+            ]
+        return cls._values_fields
+
+    @classmethod
+    def values_queryset(cls, queryset, names=None, extra=()):
+        """values() of the columns of ``names`` (all fields by default)
+        plus the ``extra`` lookups, e.g. the pagination ordering."""
+        sources = [
+            source
+            for name, source, _ in cls.get_values_fields()
+            if names is None or name in names
+        ]
+        return queryset.values(*dict.fromkeys([*sources, *extra]))
+
+    @classmethod
+    def values_to_representation(cls, rows, names=None):
+        fields = [
+            field
+            for field in cls.get_values_fields()
+            if names is None or field[0] in names
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in fields:
+                value = row[source]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
 
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -19,7 +98,7 @@ class AirportSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "closest_big_city", "country"]
 
 
-class AirportListSerializer(AirportSerializer):
+class AirportListSerializer(ValuesSerializerMixin, AirportSerializer):
     class Meta:
         model = Airport
         fields = ["id", "name", "country"]
@@ -49,7 +128,7 @@ class RouteSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class RouteListSerializer(RouteSerializer):
+class RouteListSerializer(ValuesSerializerMixin, RouteSerializer):
     source_airport = serializers.CharField(
         source="source.name",
         read_only=True
@@ -92,6 +171,24 @@ class AirplaneSerializer(serializers.ModelSerializer):
         model = Airplane
         fields = ["id", "name", "rows", "seats_in_row", "airplane_type"]
 
+    def validate(self, attrs):
+        if self.instance is not None:
+            rows = attrs.get("rows", self.instance.rows)
+            seats_in_row = attrs.get(
+                "seats_in_row", self.instance.seats_in_row
+            )
+            if (
+                rows < self.instance.rows
+                or seats_in_row < self.instance.seats_in_row
+            ):
+                Airplane.validate_cabin_size(
+                    self.instance.id,
+                    rows,
+                    seats_in_row,
+                    serializers.ValidationError,
+                )
+        return attrs
+
 
 class AirplaneListSerializer(AirplaneSerializer):
     airplane_type = serializers.CharField(
@@ -181,13 +278,42 @@ class FlightSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    def save_flight(self, save, *args):
+        """Run ``save`` and report an overlap caught by the database
+        constraint (a concurrent write) like the validation does."""
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError as error:
+            if not Flight.is_airplane_overlap_error(error):
+                raise
+            raise serializers.ValidationError(
+                {
+                    "airplane": "The airplane is already assigned to"
+                                " another flight at this time."
+                }
+            )
+
+    def create(self, validated_data):
+        return self.save_flight(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_flight(super().update, instance, validated_data)
+
+
+class FlightListSerializer(ValuesSerializerMixin, FlightSerializer):
+    values_sources = {"route": "route__display_name"}
 
-class FlightListSerializer(FlightSerializer):
     route = serializers.StringRelatedField(read_only=True)
     airplane_name = serializers.CharField(
         source="airplane.name",
         read_only=True
     )
+    tickets_available = serializers.IntegerField(
+        read_only=True,
+        help_text="Present when the flight list is annotated"
+                  " with FlightQuerySet.with_tickets_available().",
+    )
 
     class Meta:
         model = Flight
@@ -196,7 +322,8 @@ class FlightListSerializer(FlightSerializer):
             "route",
             "airplane_name",
             "departure_date",
-            "arrival_date"
+            "arrival_date",
+            "tickets_available",
         ]
 
 
@@ -217,6 +344,112 @@ class FlightRetrieveSerializer(FlightSerializer):
         ]
 
 
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ["id", "row", "seat", "flight", "expires_at"]
+        read_only_fields = ["flight", "expires_at"]
+        validators = []
+
+    def validate(self, attrs):
+        airplane = self.context["flight"].airplane
+        Ticket.validate_place(
+            attrs["row"],
+            attrs["seat"],
+            airplane.rows,
+            airplane.seats_in_row,
+            serializers.ValidationError,
+        )
+        return attrs
+
+
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlightSchedule
+        fields = [
+            "id",
+            "route",
+            "airplane",
+            "crew",
+            "days_of_week",
+            "departure_time",
+            "duration",
+            "valid_from",
+            "valid_until",
+            "generated_until",
+        ]
+
+    def validate(self, attrs):
+        def value(field):
+            if field in attrs:
+                return attrs[field]
+            return getattr(self.instance, field) if self.instance else None
+
+        FlightSchedule.validate_schedule(
+            value("days_of_week"),
+            value("valid_from"),
+            value("valid_until"),
+            serializers.ValidationError,
+        )
+        return attrs
+
+
+class CrewIdListField(serializers.ListField):
+    """List of crew IDs, also accepted as a ';'-separated string (CSV)."""
+
+    child = serializers.IntegerField()
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [crew for crew in data.replace(";", " ").split()]
+        return super().to_internal_value(data)
+
+
+class FlightImportSerializer(serializers.Serializer):
+    route = serializers.IntegerField()
+    airplane = serializers.IntegerField()
+    departure_date = serializers.DateTimeField()
+    arrival_date = serializers.DateTimeField()
+    crew = CrewIdListField(required=False, default=list)
+
+    def validate(self, attrs):
+        if attrs["departure_date"] >= attrs["arrival_date"]:
+            raise serializers.ValidationError(
+                "Departure date must be before arrival date."
+            )
+        if len(set(attrs["crew"])) != len(attrs["crew"]):
+            raise serializers.ValidationError(
+                {"crew": "Crew members must not repeat."}
+            )
+        return attrs
+
+
+class FlightSeatMapSerializer(serializers.Serializer):
+    flight = serializers.IntegerField()
+    rows = serializers.IntegerField()
+    seats_in_row = serializers.IntegerField()
+    available = serializers.IntegerField()
+    encoding = serializers.ChoiceField(choices=["rle", "bits"])
+    runs = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="Alternating free/occupied run lengths,"
+                  " starting with a free run.",
+    )
+    bitmap = serializers.CharField(
+        required=False,
+        help_text="Base64 packed bits, row-major, 1 = occupied.",
+    )
+
+
+class ConnectionSerializer(serializers.Serializer):
+    legs = FlightListSerializer(many=True)
+    stops = serializers.IntegerField()
+    total_distance = serializers.IntegerField()
+    departure_date = serializers.DateTimeField()
+    arrival_date = serializers.DateTimeField()
+
+
 class AirplaneRetrieveSerializer(AirplaneSerializer):
     flights = FlightListSerializer(many=True, read_only=True)
 
@@ -250,7 +483,25 @@ class RouteRetrieveSerializer(RouteSerializer):
         fields = ["id", "source", "destination", "distance", "flights"]
 
 
+class PrefetchedFlightField(serializers.PrimaryKeyRelatedField):
+    """Resolve flights from the ``flights`` context map filled in bulk by
+    the parent serializer, falling back to a regular lookup."""
+
+    def to_internal_value(self, data):
+        flights = self.context.get("flights")
+        if flights is not None:
+            try:
+                return flights[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    flight = PrefetchedFlightField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+
     class Meta:
         model = Ticket
         fields = ["id", "row", "seat", "flight"]
@@ -295,19 +546,223 @@ class TicketOrderRetrieveSerializer(TicketOrderListSerializer):
         fields = ["id", "row", "seat", "flight"]
 
 
+class OrderTicketSerializer(TicketSerializer):
+    count = serializers.IntegerField(
+        min_value=1,
+        default=1,
+        write_only=True,
+        help_text="Number of seats to assign automatically"
+                  " when row and seat are omitted.",
+    )
+    together = serializers.BooleanField(
+        default=False,
+        write_only=True,
+        help_text="Assign adjacent seats when row and seat are omitted.",
+    )
+
+    class Meta(TicketSerializer.Meta):
+        fields = ["id", "row", "seat", "flight", "count", "together"]
+        extra_kwargs = {
+            "row": {"required": False},
+            "seat": {"required": False},
+        }
+        # Place uniqueness is checked for the whole order at once
+        # by Ticket.find_place_conflicts.
+        validators = []
+
+    def validate(self, attrs):
+        has_row, has_seat = "row" in attrs, "seat" in attrs
+        if has_row != has_seat:
+            raise serializers.ValidationError(
+                "Provide both row and seat, or neither"
+                " to assign seats automatically."
+            )
+        if has_row:
+            if attrs["count"] != 1 or attrs["together"]:
+                raise serializers.ValidationError(
+                    "count and together apply only when"
+                    " row and seat are omitted."
+                )
+            return super().validate(attrs)
+
+        airplane = attrs["flight"].airplane
+        capacity = airplane.rows * airplane.seats_in_row
+        if attrs["count"] > capacity:
+            raise serializers.ValidationError(
+                {"count": f"The airplane has only {capacity} seats."}
+            )
+        return attrs
+
+
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = OrderTicketSerializer(
+        many=True, read_only=False, allow_empty=False
+    )
+    create_attempts = 3
+    retry_delay = 0.05
 
     class Meta:
         model = Order
         fields = ["id", "created_at", "tickets"]
 
+    def to_internal_value(self, data):
+        tickets_data = data.get("tickets") if hasattr(data, "get") else None
+        if isinstance(tickets_data, list):
+            flight_ids = set()
+            for ticket_data in tickets_data:
+                try:
+                    flight_ids.add(int(ticket_data["flight"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self.context["flights"] = Flight.objects.select_related(
+                "airplane"
+            ).in_bulk(flight_ids)
+        return super().to_internal_value(data)
+
+    def validate_tickets(self, tickets_data):
+        requested = set()
+        errors = []
+        for ticket_data in tickets_data:
+            if "row" not in ticket_data:
+                errors.append({})
+                continue
+            place = (
+                ticket_data["flight"].id,
+                ticket_data["row"],
+                ticket_data["seat"],
+            )
+            if place in requested:
+                errors.append({
+                    "seat": f"Seat {ticket_data['seat']} in row"
+                            f" {ticket_data['row']} is requested"
+                            f" more than once."
+                })
+            else:
+                errors.append({})
+            requested.add(place)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return tickets_data
+
+    @staticmethod
+    def raise_for_place_conflicts(tickets, user):
+        errors = Ticket.find_place_conflicts(tickets, user=user)
+        if any(errors):
+            raise SeatConflict({"tickets": errors})
+
+    @staticmethod
+    def is_lock_contention(error):
+        """Whether an OperationalError is a lock or serialization failure
+        of concurrent transactions, as opposed to e.g. a lost connection
+        or a missing table."""
+        cause = error.__cause__
+        code = getattr(cause, "sqlstate", None) or getattr(
+            cause, "pgcode", None
+        )
+        if code is not None:
+            # serialization_failure, deadlock_detected, lock_not_available
+            return code in ("40001", "40P01", "55P03")
+        if cause is not None and cause.args and isinstance(
+            cause.args[0], int
+        ):
+            # MySQL lock wait timeout and deadlock
+            return cause.args[0] in (1205, 1213)
+        # SQLite: "database is locked", "database table is locked"
+        return "is locked" in str(error)
+
     def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets")
+        for attempt in range(1, self.create_attempts + 1):
+            try:
+                return self.create_order(validated_data, tickets_data)
+            except (IntegrityError, OperationalError) as error:
+                if isinstance(
+                    error, OperationalError
+                ) and not self.is_lock_contention(error):
+                    raise
+                if attempt == self.create_attempts:
+                    raise SeatConflict(
+                        "The booking could not be completed because of"
+                        " concurrent orders for the same flight."
+                        " Please try again."
+                    )
+                time.sleep(self.retry_delay * attempt)
+
+    @staticmethod
+    def assign_places(tickets_data, user=None):
+        """Yield (ticket data, (row, seat)) for every ticket, picking free
+        seats from the flight occupancy for entries without a place,
+        the seats ``user`` holds first."""
+        seat_maps = {}
+        for ticket_data in tickets_data:
+            if "row" in ticket_data:
+                yield ticket_data, (ticket_data["row"], ticket_data["seat"])
+                continue
+
+            flight = ticket_data["flight"]
+            seat_map = seat_maps.get(flight.id)
+            if seat_map is None:
+                seat_map = seat_maps[flight.id] = SeatMap.for_flight(
+                    flight, user
+                )
+                for other in tickets_data:
+                    if "row" in other and other["flight"].id == flight.id:
+                        seat_map.occupy(other["row"], other["seat"])
+
+            places = seat_map.find_free(
+                ticket_data["count"],
+                ticket_data["together"],
+                preferred=seat_map.user_holds,
+            )
+            if places is None:
+                raise SeatConflict(
+                    f"Flight {flight.id} has no"
+                    f" {ticket_data['count']}"
+                    f"{' adjacent' if ticket_data['together'] else ''}"
+                    f" free seats."
+                )
+            for place in places:
+                seat_map.occupy(*place)
+                yield ticket_data, place
+
+    def create_order(self, validated_data, tickets_data):
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
+            # Lock the booked flights in a stable order, so concurrent
+            # orders for the same flight are serialized without deadlocks.
+            list(
+                Flight.objects.select_for_update()
+                .filter(id__in={data["flight"].id for data in tickets_data})
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            tickets = [
+                Ticket(
+                    order=order,
+                    flight=ticket_data["flight"],
+                    row=row,
+                    seat=seat,
+                )
+                for ticket_data, (row, seat) in self.assign_places(
+                    tickets_data, order.user
+                )
+            ]
+            self.raise_for_place_conflicts(tickets, order.user)
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(tickets)
+            except IntegrityError:
+                self.raise_for_place_conflicts(tickets, order.user)
+                raise
+            bump_model_versions(Ticket)
+            SeatHold.objects.filter(
+                reduce(operator.or_, (
+                    Q(flight_id=ticket.flight_id, row=ticket.row,
+                      seat=ticket.seat)
+                    for ticket in tickets
+                )),
+                user=order.user,
+            ).delete()
             return order
 
 
@@ -0,0 +1,67 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from airservice.airport_index import VERSION_NAME as AIRPORT_INDEX_VERSION
+from airservice.cache import (
+    bump_model_versions,
+    bump_version_on_commit,
+    set_deleted_at,
+)
+from airservice.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    Route,
+    Ticket,
+)
+from airservice.route_graph import VERSION_NAME as ROUTE_GRAPH_VERSION
+
+
+# Models whose version stamps key the cached responses of the catalogue
+# endpoints, see ResponseCacheMixin
+CACHED_MODELS = (
+    Airport, Route, AirplaneType, Airplane, Crew, Flight, Ticket
+)
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+def invalidate_route_graph(sender, **kwargs):
+    bump_version_on_commit(ROUTE_GRAPH_VERSION)
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+def invalidate_airport_index(sender, **kwargs):
+    bump_version_on_commit(AIRPORT_INDEX_VERSION)
+
+
+@receiver(post_delete, sender=Airport)
+@receiver(post_delete, sender=AirplaneType)
+@receiver(post_delete, sender=Airplane)
+@receiver(post_delete, sender=Route)
+def record_reference_data_deletion(sender, **kwargs):
+    # Deletions do not move MAX(updated_at), see ConditionalGetMixin
+    transaction.on_commit(partial(set_deleted_at, sender))
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_model_versions(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def invalidate_cached_crew_assignments(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_model_versions(Flight, Crew)
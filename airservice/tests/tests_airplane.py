@@ -6,9 +6,18 @@ from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
-from django.db import IntegrityError
-
-from airservice.models import AirplaneType, Airplane, Airport, Route, Flight
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+
+from airservice.models import (
+    AirplaneType,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+)
 from airservice.serializers import (
     AirplaneListSerializer,
     AirplaneRetrieveSerializer
@@ -73,6 +82,19 @@ class AuthorizedAirplaneTests(AirplaneBaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["results"], serializer.data)
 
+    def test_airplane_list_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                AIRPLANE_URL, {"fields": "id,airplane_type"}
+            )
+
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "airplane_type"}
+        )
+        select = queries[-1]["sql"]
+        self.assertIn('"airservice_airplanetype"."name"', select)
+        self.assertNotIn('"airservice_airplane"."rows"', select)
+
     def test_retrieve_airplane(self):
         airport_1 = Airport.objects.create(
             name="Arlanda",
@@ -158,6 +180,36 @@ class AdminAirplaneTests(AirplaneBaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(self.airplane_1.name, "Airbus C300")
 
+    def test_cannot_shrink_cabin_below_sold_seats(self):
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="KBP", closest_big_city="Kyiv", country="Ukraine"
+            ),
+            destination=Airport.objects.create(
+                name="WAW", closest_big_city="Warsaw", country="Poland"
+            ),
+            distance=700,
+        )
+        flight = Flight.objects.create(
+            route=route,
+            airplane=self.airplane_1,
+            departure_date=timezone.now() + timedelta(days=1),
+            arrival_date=timezone.now() + timedelta(days=1, hours=2),
+        )
+        Ticket.objects.create(
+            row=25,
+            seat=6,
+            flight=flight,
+            order=Order.objects.create(user=self.user),
+        )
+        url = detail_url(self.airplane_1.id)
+
+        response = self.client.patch(url, {"rows": 20})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {"rows": 25})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_delete_airplane(self):
         url = detail_url(self.airplane_1.id)
         response = self.client.delete(url)
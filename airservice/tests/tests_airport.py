@@ -1,10 +1,17 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from django.db import IntegrityError
 
+from airservice.airport_index import (
+    AirportIndex,
+    search_airports,
+    search_database,
+)
 from airservice.models import Airport, Route
 from airservice.serializers import (
     AirportListSerializer,
@@ -13,6 +20,7 @@ from airservice.serializers import (
 
 
 AIRPORT_URL = reverse("airservice:airport-list")
+AUTOCOMPLETE_URL = reverse("airservice:airport-autocomplete")
 
 
 def detail_url(airport_id):
@@ -61,6 +69,7 @@ class UnauthenticatedAirportApiTests(AirportBaseTest):
 
 class AuthenticatedAirportApiTests(AirportBaseTest):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test@test.com",
@@ -76,6 +85,19 @@ class AuthenticatedAirportApiTests(AirportBaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["results"], serializer.data)
 
+    def test_airports_list_values_fast_path_is_byte_identical(self):
+        queryset = Airport.objects.all()
+        rows = AirportListSerializer.values_to_representation(
+            AirportListSerializer.values_queryset(queryset)
+        )
+
+        self.assertEqual(
+            JSONRenderer().render(rows),
+            JSONRenderer().render(
+                AirportListSerializer(queryset, many=True).data
+            ),
+        )
+
     def test_airports_sorted_by_name(self):
         response = self.client.get(AIRPORT_URL)
         names = [airport["name"] for airport in response.data["results"]]
@@ -93,6 +115,97 @@ class AuthenticatedAirportApiTests(AirportBaseTest):
         self.assertEqual(len(response.data["departure"]), 1)
         self.assertEqual(len(response.data["arrival"]), 1)
 
+    def test_filter_airports_by_country(self):
+        response = self.client.get(AIRPORT_URL, {"country": "sweden"})
+
+        self.assertEqual(
+            [airport["id"] for airport in response.data["results"]],
+            [self.airport_1.id],
+        )
+
+    def test_filter_airports_by_name_prefix(self):
+        Airport.objects.create(
+            name="Arad", closest_big_city="Arad", country="Romania"
+        )
+
+        response = self.client.get(AIRPORT_URL, {"name_prefix": "AR"})
+
+        self.assertEqual(
+            [airport["name"] for airport in response.data["results"]],
+            ["Arad", "Arlanda"],
+        )
+
+    def test_retrieve_airport_reads_routes_from_route_graph(self):
+        url = detail_url(self.airport_1.id)
+        self.client.get(url)
+
+        # The conditional GET stamps, which also date the route graph,
+        # and the airport itself
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(
+            response.data["departure"],
+            [
+                {
+                    "id": self.route_1.id,
+                    "source_airport": "Arlanda",
+                    "destination_airport": "MUC",
+                    "distance": 100,
+                }
+            ],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route_1.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data["departure"], [])
+
+    def test_retrieve_airport_sparse_fields(self):
+        url = detail_url(self.airport_1.id)
+
+        response = self.client.get(url, {"fields": "name,departure"})
+
+        self.assertEqual(list(response.data), ["name", "departure"])
+        self.assertEqual(len(response.data["departure"]), 1)
+
+    def test_airports_list_conditional_get(self):
+        response = self.client.get(AIRPORT_URL)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(
+            AIRPORT_URL, {"country": "Sweden"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.airport_2.closest_big_city = "Freising"
+        self.airport_2.save()
+        response = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_airports_list_etag_changes_on_delete(self):
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+        self.airport_2.delete()
+
+        response = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_airport_if_modified_since(self):
+        url = detail_url(self.airport_1.id)
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_create_airport_forbidden(self):
         payload = {
             "name": "BER",
@@ -148,3 +261,86 @@ class AdminAirportTests(AirportBaseTest):
         response = self.client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class AirportAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, country in (
+            ("Bergamo", "Italy"),
+            ("Berlin Brandenburg", "Germany"),
+            ("Bern", "Switzerland"),
+            ("Hamburg", "Germany"),
+            ("Oberpfaffenhofen", "Germany"),
+        ):
+            Airport.objects.create(
+                name=name, closest_big_city=name, country=country
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def names(self, matches):
+        return [airport["name"] for airport in matches]
+
+    def test_prefix_matches_before_substring_matches(self):
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "BER"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.names(response.data),
+            ["Bergamo", "Berlin Brandenburg", "Bern", "Oberpfaffenhofen"],
+        )
+        self.assertEqual(
+            set(response.data[0]), {"id", "name", "country"}
+        )
+
+    def test_limit(self):
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "b", "limit": 2})
+        self.assertEqual(
+            self.names(response.data), ["Bergamo", "Berlin Brandenburg"]
+        )
+
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "b", "limit": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_required(self):
+        response = self.client.get(AUTOCOMPLETE_URL)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_database_search_matches_index(self):
+        index = AirportIndex.build()
+
+        for query in ("ber", "burg", "o", "xyz"):
+            for limit in (1, 3, 10):
+                self.assertEqual(
+                    search_database(query, limit),
+                    index.search(query, limit),
+                )
+
+    def test_index_rebuilt_after_airport_changes(self):
+        self.assertEqual(
+            self.names(search_airports("berl", 5)), ["Berlin Brandenburg"]
+        )
+        # Only the index version, read from the database with the local
+        # memory cache
+        with self.assertNumQueries(1):
+            search_airports("berl", 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(
+                name="Berlin Tegel",
+                closest_big_city="Berlin",
+                country="Germany",
+            )
+            Airport.objects.get(name="Berlin Brandenburg").delete()
+
+        self.assertEqual(
+            self.names(search_airports("berl", 5)), ["Berlin Tegel"]
+        )
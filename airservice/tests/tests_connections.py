@@ -0,0 +1,292 @@
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airservice.connections import find_route_paths
+from airservice.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Route,
+    Flight,
+)
+from airservice.route_graph import RouteGraph, get_route_graph
+
+
+CONNECTION_URL = reverse("airservice:connection-list")
+DAY = date(2026, 11, 3)
+
+
+def at(hour, minute=0, days=0):
+    return timezone.make_aware(
+        datetime(DAY.year, DAY.month, DAY.day, hour, minute)
+    ) + timedelta(days=days)
+
+
+class ConnectionBaseTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.kbp, cls.waw, cls.lhr, cls.cdg = (
+            Airport.objects.create(
+                name=name, closest_big_city=city, country=country
+            )
+            for name, city, country in (
+                ("KBP", "Kyiv", "Ukraine"),
+                ("WAW", "Warsaw", "Poland"),
+                ("LHR", "London", "United Kingdom"),
+                ("CDG", "Paris", "France"),
+            )
+        )
+        cls.kbp_waw = Route.objects.create(
+            source=cls.kbp, destination=cls.waw, distance=700
+        )
+        cls.waw_lhr = Route.objects.create(
+            source=cls.waw, destination=cls.lhr, distance=1450
+        )
+        cls.kbp_lhr = Route.objects.create(
+            source=cls.kbp, destination=cls.lhr, distance=2150
+        )
+        cls.waw_cdg = Route.objects.create(
+            source=cls.waw, destination=cls.cdg, distance=1370
+        )
+        cls.cdg_lhr = Route.objects.create(
+            source=cls.cdg, destination=cls.lhr, distance=350
+        )
+        airplane_type = AirplaneType.objects.create(name="Narrow body")
+        cls.airplanes = [
+            Airplane.objects.create(
+                name=f"Plane {index}",
+                rows=20,
+                seats_in_row=6,
+                airplane_type=airplane_type,
+            )
+            for index in range(5)
+        ]
+
+        def flight(route, airplane, departure_date, hours):
+            return Flight.objects.create(
+                route=route,
+                airplane=cls.airplanes[airplane],
+                departure_date=departure_date,
+                arrival_date=departure_date + timedelta(hours=hours),
+            )
+
+        cls.direct = flight(cls.kbp_lhr, 0, at(12), 4)
+        cls.first_leg = flight(cls.kbp_waw, 1, at(7), 1)
+        cls.tight_second_leg = flight(cls.waw_lhr, 2, at(8, 20), 2)
+        cls.second_leg = flight(cls.waw_lhr, 3, at(9, 30), 2)
+        cls.next_day_direct = flight(cls.kbp_lhr, 4, at(12, days=1), 4)
+
+
+class RouteGraphTests(ConnectionBaseTest):
+    def setUp(self):
+        cache.clear()
+
+    def test_find_route_paths_shortest_first(self):
+        graph = RouteGraph.build()
+
+        paths = find_route_paths(graph, self.kbp.id, self.lhr.id, 3, 10)
+
+        self.assertEqual(
+            paths,
+            [
+                (2150, (self.kbp_lhr.id,)),
+                (2150, (self.kbp_waw.id, self.waw_lhr.id)),
+                (2420, (self.kbp_waw.id, self.waw_cdg.id, self.cdg_lhr.id)),
+            ],
+        )
+        self.assertEqual(
+            find_route_paths(graph, self.kbp.id, self.lhr.id, 2, 1),
+            [(2150, (self.kbp_lhr.id,))],
+        )
+
+    def test_find_route_paths_stops_at_limit(self):
+        # A direct route next to a densely connected cluster of airports
+        hubs = range(1, 6)
+        routes = {0: [(9, 0, 1)] + [(hub, hub, 10) for hub in hubs]}
+        for hub in hubs:
+            routes[hub] = [(9, 10 * hub, 10)] + [
+                (other, 10 * hub + other, 10)
+                for other in hubs if other != hub
+            ]
+        graph = mock.Mock()
+        graph.routes_from.side_effect = lambda airport_id: routes.get(
+            airport_id, []
+        )
+
+        self.assertEqual(find_route_paths(graph, 0, 9, 3, 1), [(1, (0,))])
+        self.assertEqual(graph.routes_from.call_count, 1)
+
+    def test_find_route_paths_same_airport(self):
+        graph = RouteGraph.build()
+
+        self.assertEqual(
+            find_route_paths(graph, self.kbp.id, self.kbp.id, 3, 10), []
+        )
+
+    def test_route_graph_version_shared_by_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased"
+                               ".FileBasedCache",
+                    "LOCATION": directory,
+                }
+            }
+            with self.settings(CACHES=caches):
+                graph = get_route_graph()
+                with self.assertNumQueries(0):
+                    self.assertIs(get_route_graph(), graph)
+
+    def test_route_graph_sees_changes_of_other_workers(self):
+        graph = get_route_graph()
+
+        # Committed by another worker, whose version bump this process's
+        # local memory cache never sees
+        route = Route.objects.create(
+            source=self.lhr, destination=self.kbp, distance=2150
+        )
+
+        self.assertIsNot(get_route_graph(), graph)
+        self.assertIn(
+            (self.kbp.id, route.id, 2150),
+            get_route_graph().routes_from(self.lhr.id),
+        )
+
+    def test_route_graph_neighbours_sorted_by_airport_name(self):
+        graph = RouteGraph.build()
+
+        self.assertEqual(
+            list(graph.routes_from(self.waw.id)),
+            [
+                (self.cdg.id, self.waw_cdg.id, 1370),
+                (self.lhr.id, self.waw_lhr.id, 1450),
+            ],
+        )
+        self.assertEqual(
+            [route_id for _, route_id, _ in graph.routes_to(self.lhr.id)],
+            [self.cdg_lhr.id, self.kbp_lhr.id, self.waw_lhr.id],
+        )
+        self.assertEqual(list(graph.routes_from(-1)), [])
+
+    def test_route_graph_cached_until_routes_change(self):
+        graph = get_route_graph()
+
+        # The local memory cache is not shared by the workers, so the
+        # version is read from the database
+        with self.assertNumQueries(1):
+            self.assertIs(get_route_graph(), graph)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route = Route.objects.create(
+                source=self.lhr, destination=self.kbp, distance=2150
+            )
+        rebuilt = get_route_graph()
+        self.assertIsNot(rebuilt, graph)
+        self.assertIn(
+            (self.kbp.id, route.id, 2150), rebuilt.routes_from(self.lhr.id)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cdg.delete()
+        self.assertEqual(
+            list(get_route_graph().routes_from(self.waw.id)),
+            [(self.lhr.id, self.waw_lhr.id, 1450)],
+        )
+
+
+class ConnectionApiTests(ConnectionBaseTest):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def search(self, **params):
+        params = {
+            "from": self.kbp.id,
+            "to": self.lhr.id,
+            "date": DAY.isoformat(),
+            **params,
+        }
+        return self.client.get(CONNECTION_URL, params)
+
+    def test_connections(self):
+        get_route_graph()
+        # The route graph version and the flights
+        with self.assertNumQueries(2):
+            response = self.search()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                [leg["id"] for leg in itinerary["legs"]]
+                for itinerary in response.data
+            ],
+            [[self.first_leg.id, self.second_leg.id], [self.direct.id]],
+        )
+        self.assertEqual(response.data[0]["stops"], 1)
+        self.assertEqual(response.data[0]["total_distance"], 2150)
+        self.assertEqual(
+            response.data[0]["legs"][0]["route"], self.kbp_waw.display_name
+        )
+
+    def test_connections_max_legs(self):
+        response = self.search(max_legs=1)
+        self.assertEqual(
+            [itinerary["legs"][0]["id"] for itinerary in response.data],
+            [self.direct.id],
+        )
+
+    def test_connections_no_flights(self):
+        response = self.search(date=(DAY - timedelta(days=1)).isoformat())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_connections_invalid_params(self):
+        for params in (
+            {"from": "KBP"},
+            {"date": "tomorrow"},
+            {"max_legs": 4},
+        ):
+            with self.subTest(params=params):
+                response = self.search(**params)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_connections_same_airport(self):
+        response = self.search(to=self.kbp.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("to", response.data)
+
+    def test_connections_result_limit(self):
+        with self.settings(CONNECTION_MAX_RESULTS=1):
+            response = self.search()
+        self.assertEqual(
+            [
+                [leg["id"] for leg in itinerary["legs"]]
+                for itinerary in response.data
+            ],
+            [[self.first_leg.id, self.second_leg.id]],
+        )
+
+    def test_connections_require_params(self):
+        response = self.client.get(CONNECTION_URL)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_required(self):
+        self.client.force_authenticate(user=None)
+        response = self.search()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,200 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airservice.export import DATASETS, dataset_queryset, stream_export
+from airservice.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+)
+
+
+def export_url(dataset):
+    return reverse(f"airservice:export-{dataset}")
+
+
+class ExportBaseTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        source = Airport.objects.create(
+            name="KBP", closest_big_city="Kyiv", country="Ukraine"
+        )
+        destination = Airport.objects.create(
+            name="WAW", closest_big_city="Warsaw", country="Poland"
+        )
+        cls.route = Route.objects.create(
+            source=source, destination=destination, distance=700
+        )
+        cls.airplane = Airplane.objects.create(
+            name="Plane A",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Type A"),
+        )
+        departure_date = timezone.now().replace(microsecond=123456)
+        cls.flights = [
+            Flight.objects.create(
+                route=cls.route,
+                airplane=cls.airplane,
+                departure_date=departure_date + timedelta(days=day),
+                arrival_date=departure_date + timedelta(days=day, hours=2),
+            )
+            for day in range(3)
+        ]
+        cls.user = get_user_model().objects.create_user(
+            email="passenger@test.com",
+            password="testpass",
+            first_name="Olena",
+            last_name="Kovalenko",
+        )
+        order = Order.objects.create(user=cls.user)
+        for row, seat in ((2, 1), (1, 3), (1, 2)):
+            Ticket.objects.create(
+                row=row, seat=seat, flight=cls.flights[0], order=order
+            )
+        Ticket.objects.create(
+            row=1, seat=1, flight=cls.flights[1], order=order
+        )
+
+
+class ExportApiTests(ExportBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def get(self, dataset, **params):
+        response = self.client.get(export_url(dataset), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b"".join(response.streaming_content)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(export_url("flights"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_flights_ndjson(self):
+        response, content = self.get("flights")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [flight.id for flight in self.flights],
+        )
+        self.assertEqual(rows[0]["route"], "KBP - WAW")
+        self.assertEqual(
+            rows[0]["departure_date"],
+            self.flights[0].departure_date.isoformat().replace(
+                "+00:00", "Z"
+            ),
+        )
+
+    def test_tickets_csv(self):
+        response, content = self.get("tickets", export_format="csv")
+
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="tickets.csv"',
+        )
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            list(rows[0]), [name for name, _ in DATASETS["tickets"]]
+        )
+        self.assertEqual(rows[0]["user_id"], str(self.user.id))
+
+    def test_gzip(self):
+        _, plain = self.get("tickets")
+        response, compressed = self.get("tickets", compress="gzip")
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_manifest_ordered_by_seat(self):
+        _, content = self.get("manifest", flight=self.flights[0].id)
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [(row["row"], row["seat"]) for row in rows],
+            [(1, 2), (1, 3), (2, 1)],
+        )
+        self.assertEqual(rows[0]["passenger_last_name"], "Kovalenko")
+
+    def test_manifest_requires_existing_flight(self):
+        response = self.client.get(export_url("manifest"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(export_url("manifest"), {"flight": 0})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_format(self):
+        response = self.client.get(
+            export_url("flights"), {"export_format": "xml"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streams_in_blocks(self):
+        with override_settings(EXPORT_BUFFER_SIZE=1):
+            blocks = list(
+                stream_export(
+                    dataset_queryset("tickets"),
+                    DATASETS["tickets"],
+                    chunk_size=2,
+                )
+            )
+
+        self.assertEqual(len(blocks), 4)
+
+
+class ExportCommandTests(ExportBaseTest):
+    def test_export_manifest_to_stdout(self):
+        out = io.StringIO()
+
+        call_command(
+            "export_data",
+            "manifest",
+            "--flight",
+            str(self.flights[1].id),
+            "--format",
+            "csv",
+            stdout=out,
+        )
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["passenger_email"], "passenger@test.com")
+
+    def test_export_gzip_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "flights.ndjson.gz"
+
+            call_command("export_data", "flights", "--gzip", "--output", path)
+
+            lines = gzip.decompress(path.read_bytes()).splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_manifest_requires_flight(self):
+        with self.assertRaises(CommandError):
+            call_command("export_data", "manifest")
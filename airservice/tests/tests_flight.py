@@ -1,12 +1,22 @@
-from datetime import timedelta
+import base64
+import json
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command, CommandError
 from django.utils import timezone
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
-from django.db import models
+from django.db import models, connection, IntegrityError
+from django.test.utils import CaptureQueriesContext
 
 from airservice.models import (
     Airport,
@@ -15,7 +25,13 @@ from airservice.models import (
     Airplane,
     Route,
     Crew,
+    Order,
+    Ticket,
+    SeatHold,
 )
+from airservice.pagination import FlightCursorPagination
+from airservice.scheduling import sweep_overlaps
+from airservice.seating import SeatMap
 from airservice.serializers import (
     FlightListSerializer,
     FlightRetrieveSerializer,
@@ -24,12 +40,21 @@ from airservice.serializers import (
 
 
 FLIGHT_URL = reverse("airservice:flight-list")
+FLIGHT_BULK_URL = reverse("airservice:flight-bulk")
 
 
 def detail_url(flight_id):
     return reverse("airservice:flight-detail", args=(flight_id,))
 
 
+def seats_url(flight_id):
+    return reverse("airservice:flight-seats", args=(flight_id,))
+
+
+def holds_url(flight_id):
+    return reverse("airservice:flight-holds", args=(flight_id,))
+
+
 class FlightBaseTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -96,7 +121,7 @@ class AuthenticatedFightApiTests(FlightBaseTest):
 
     def test_flights_list(self):
         response = self.client.get(FLIGHT_URL)
-        flights = Flight.objects.all()
+        flights = Flight.objects.with_tickets_available()
         serializer = FlightListSerializer(flights, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -110,6 +135,92 @@ class AuthenticatedFightApiTests(FlightBaseTest):
         ]
         self.assertEqual(flights, sorted(flights))
 
+    def test_flights_list_tickets_available(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+        Ticket.objects.create(row=1, seat=2, flight=self.flight, order=order)
+
+        response = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(
+            response.data["results"][0]["tickets_available"], 10 * 6 - 2
+        )
+
+    def test_flights_list_values_fast_path_is_byte_identical(self):
+        queryset = Flight.objects.with_tickets_available().order_by(
+            "departure_date", "arrival_date", "id"
+        )
+        rows = FlightListSerializer.values_to_representation(
+            FlightListSerializer.values_queryset(queryset)
+        )
+
+        self.assertEqual(
+            JSONRenderer().render(rows),
+            JSONRenderer().render(
+                FlightListSerializer(queryset, many=True).data
+            ),
+        )
+
+    def test_flights_list_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(FLIGHT_URL, {"page_size": 100})
+
+        for day in range(1, 21):
+            Flight.objects.create(
+                route=self.route_2,
+                airplane=self.airplane_2,
+                departure_date=timezone.now() + timedelta(days=day),
+                arrival_date=(
+                    timezone.now() + timedelta(days=day, hours=2)
+                ),
+            )
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(FLIGHT_URL, {"page_size": 100})
+
+        self.assertEqual(len(response.data["results"]), 21)
+        self.assertEqual(len(before), len(after))
+
+    def test_retrieve_flight_sparse_fields(self):
+        url = detail_url(self.flight.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, {"fields": "id,route,departure_date"}
+            )
+
+        self.assertEqual(
+            response.data,
+            {
+                "id": self.flight.id,
+                "route": self.route_1.display_name,
+                "departure_date": FlightRetrieveSerializer(
+                    self.flight
+                ).data["departure_date"],
+            },
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("airservice_airplane", queries[0]["sql"])
+        self.assertNotIn("arrival_date", queries[0]["sql"].split("FROM")[0])
+
+    def test_flights_list_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                FLIGHT_URL, {"fields": "airplane_name,id"}
+            )
+
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.flight.id, "airplane_name": "Plane A"}],
+        )
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries)
+        )
+
+    def test_sparse_fields_unknown(self):
+        response = self.client.get(FLIGHT_URL, {"fields": "id,crew"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_retrieve_flight(self):
         url = detail_url(self.flight.id)
         response = self.client.get(url)
@@ -200,6 +311,41 @@ class AdminFlightTests(FlightBaseTest):
         self.assertIn("crew", serializer.errors)
         self.assertIn("Jack Jones", str(serializer.errors["crew"]))
 
+    def test_serializer_reports_every_conflicting_crew_member(self):
+        self.flight.crew.add(self.crew_2)
+        payload = {
+            "route": self.route_2.id,
+            "airplane": self.airplane_2.id,
+            "departure_date": timezone.now(),
+            "arrival_date": timezone.now() + timedelta(hours=2),
+            "crew": [self.crew_1.id, self.crew_2.id],
+        }
+        serializer = FlightSerializer(data=payload)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(len(serializer.errors["crew"]), 2)
+        self.assertIn("Jack Jones", str(serializer.errors["crew"]))
+        self.assertIn("Jon Jones", str(serializer.errors["crew"]))
+        self.assertIn(
+            f"flight {self.flight.id}", str(serializer.errors["crew"])
+        )
+
+    def test_crew_conflicts_use_single_query(self):
+        crew = [
+            Crew.objects.create(first_name=f"Member{i}", last_name="Crew")
+            for i in range(12)
+        ]
+        self.flight.crew.add(*crew)
+        with self.assertNumQueries(1):
+            conflicts = Flight.find_crew_conflicts(
+                crew,
+                self.flight.departure_date,
+                self.flight.arrival_date,
+            )
+        self.assertEqual(len(conflicts), 12)
+        self.assertTrue(
+            all(flight == self.flight for _, flight in conflicts)
+        )
+
     def test_serializer_validates_assigned_airplane(self):
         payload = {
             "route": self.route_2.id,
@@ -240,6 +386,64 @@ class AdminFlightTests(FlightBaseTest):
         self.assertFalse(serializer.is_valid())
         self.assertIn("non_field_errors", serializer.errors)
 
+    def test_serializer_allows_back_to_back_flights(self):
+        payload = {
+            "route": self.route_2.id,
+            "airplane": self.airplane_1.id,
+            "departure_date": self.flight.arrival_date,
+            "arrival_date": self.flight.arrival_date + timedelta(hours=2),
+            "crew": [self.crew_1.id],
+        }
+        serializer = FlightSerializer(data=payload)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_overlap_check_does_not_depend_on_history(self):
+        payload = {
+            "route": self.route_2.id,
+            "airplane": self.airplane_1.id,
+            "departure_date": timezone.now() + timedelta(days=1),
+            "arrival_date": timezone.now() + timedelta(days=1, hours=2),
+            "crew": [self.crew_1.id],
+        }
+
+        with CaptureQueriesContext(connection) as before:
+            self.assertTrue(FlightSerializer(data=payload).is_valid())
+
+        for day in range(1, 21):
+            flight = Flight.objects.create(
+                route=self.route_1,
+                airplane=self.airplane_1,
+                departure_date=timezone.now() - timedelta(days=day),
+                arrival_date=(
+                    timezone.now() - timedelta(days=day) + timedelta(hours=2)
+                ),
+            )
+            flight.crew.add(self.crew_1)
+
+        with CaptureQueriesContext(connection) as after:
+            self.assertTrue(FlightSerializer(data=payload).is_valid())
+
+        self.assertEqual(len(before), len(after))
+
+    def test_overlap_constraint_violation_is_a_validation_error(self):
+        payload = {
+            "route": self.route_2.id,
+            "airplane": self.airplane_2.id,
+            "departure_date": timezone.now() + timedelta(days=3),
+            "arrival_date": timezone.now() + timedelta(days=3, hours=2),
+            "crew": [self.crew_2.id],
+        }
+        error = IntegrityError(
+            'conflicting key value violates exclusion constraint'
+            f' "{Flight.AIRPLANE_OVERLAP_CONSTRAINT}"'
+        )
+
+        with mock.patch.object(Flight, "save", side_effect=error):
+            response = self.client.post(FLIGHT_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", response.data)
+
     def test_update_flight(self):
         payload = {
             "route": self.route_2.id,
@@ -254,3 +458,586 @@ class AdminFlightTests(FlightBaseTest):
         url = detail_url(self.flight.id)
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class FlightSeatMapTests(FlightBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=self.user)
+        order = Order.objects.create(user=self.user)
+        for row, seat in [(1, 1), (1, 2), (10, 6)]:
+            Ticket.objects.create(
+                row=row, seat=seat, flight=self.flight, order=order
+            )
+
+    def test_seat_map_runs(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(seats_url(self.flight.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 10)
+        self.assertEqual(response.data["seats_in_row"], 6)
+        self.assertEqual(response.data["available"], 57)
+        self.assertEqual(response.data["runs"], [0, 2, 57, 1])
+
+    def test_seat_map_packed_bits(self):
+        response = self.client.get(
+            seats_url(self.flight.id), {"encoding": "bits"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        seat_map = SeatMap(10, 6)
+        seat_map.bits[:] = base64.b64decode(response.data["bitmap"])
+        self.assertTrue(seat_map.is_occupied(1, 1))
+        self.assertTrue(seat_map.is_occupied(1, 2))
+        self.assertFalse(seat_map.is_occupied(1, 3))
+        self.assertTrue(seat_map.is_occupied(10, 6))
+        self.assertEqual(seat_map.occupied_count, 3)
+
+    def test_seat_map_after_airplane_was_made_smaller(self):
+        Airplane.objects.filter(pk=self.flight.airplane_id).update(rows=5)
+
+        response = self.client.get(seats_url(self.flight.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["available"], 28)
+
+    def test_seat_map_invalid_encoding(self):
+        response = self.client.get(
+            seats_url(self.flight.id), {"encoding": "xml"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SeatMapTests(TestCase):
+    def test_find_free_together_within_row(self):
+        seat_map = SeatMap(3, 4, [(1, 2), (2, 4)])
+        self.assertEqual(seat_map.find_free(3, together=True), [
+            (2, 1), (2, 2), (2, 3)
+        ])
+
+    def test_find_free_together_larger_than_row(self):
+        seat_map = SeatMap(3, 4, [(1, 2)])
+        self.assertEqual(
+            seat_map.find_free(6, together=True),
+            [(1, 3), (1, 4), (2, 1), (2, 2), (2, 3), (2, 4)],
+        )
+
+    def test_places_outside_cabin_are_ignored(self):
+        seat_map = SeatMap(2, 2, [(1, 3), (3, 1), (2, 2)])
+        self.assertEqual(seat_map.occupied_count, 1)
+        self.assertFalse(seat_map.is_occupied(1, 3))
+
+    def test_find_free_not_enough_seats(self):
+        seat_map = SeatMap(2, 2, [(1, 1), (2, 2)])
+        self.assertIsNone(seat_map.find_free(2, together=True))
+        self.assertEqual(seat_map.find_free(2), [(1, 2), (2, 1)])
+        self.assertIsNone(seat_map.find_free(3))
+
+
+class FlightSeatHoldTests(FlightBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_hold_seat(self):
+        response = self.client.post(
+            holds_url(self.flight.id), {"row": 2, "seat": 3}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get(id=response.data["id"])
+        self.assertEqual(hold.user, self.user)
+        self.assertGreater(hold.expires_at, timezone.now())
+
+    def test_hold_seat_held_by_another_user(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            row=2,
+            seat=3,
+            user=self.other_user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        response = self.client.post(
+            holds_url(self.flight.id), {"row": 2, "seat": 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_seat_replaces_expired_hold(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            row=2,
+            seat=3,
+            user=self.other_user,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        response = self.client.post(
+            holds_url(self.flight.id), {"row": 2, "seat": 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_hold_sold_seat(self):
+        order = Order.objects.create(user=self.other_user)
+        Ticket.objects.create(row=2, seat=3, flight=self.flight, order=order)
+        response = self.client.post(
+            holds_url(self.flight.id), {"row": 2, "seat": 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_validates_place(self):
+        response = self.client.post(
+            holds_url(self.flight.id), {"row": 11, "seat": 3}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row", response.data)
+
+    def test_release_hold(self):
+        self.client.post(holds_url(self.flight.id), {"row": 2, "seat": 3})
+        response = self.client.delete(
+            holds_url(self.flight.id) + "?row=2&seat=3"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_held_seat_shown_on_seat_map(self):
+        self.client.post(holds_url(self.flight.id), {"row": 1, "seat": 2})
+        response = self.client.get(seats_url(self.flight.id))
+        self.assertEqual(response.data["runs"], [1, 1, 58])
+
+
+class AuditScheduleTests(FlightBaseTest):
+    def test_sweep_overlaps(self):
+        intervals = [
+            (1, 0, 10, "a"),
+            (1, 2, 4, "b"),
+            (1, 5, 12, "c"),
+            (1, 12, 14, "d"),
+            (2, 3, 6, "e"),
+        ]
+        self.assertEqual(
+            [(earlier[3], later[3])
+             for earlier, later in sweep_overlaps(intervals)],
+            [("a", "b"), ("a", "c")],
+        )
+
+    def test_sweep_overlaps_reports_nested_pairs(self):
+        intervals = [
+            (1, 0, 10, "a"),
+            (1, 1, 3, "b"),
+            (1, 2, 4, "c"),
+        ]
+        self.assertEqual(
+            [(earlier[3], later[3])
+             for earlier, later in sweep_overlaps(intervals)],
+            [("a", "b"), ("a", "c"), ("b", "c")],
+        )
+
+    def test_audit_schedule_reports_double_bookings(self):
+        start = self.flight.departure_date + timedelta(hours=1)
+        conflicting = Flight.objects.bulk_create([
+            Flight(
+                route=self.route_2,
+                airplane=self.airplane_1,
+                departure_date=start,
+                arrival_date=start + timedelta(hours=2),
+            ),
+            Flight(
+                route=self.route_2,
+                airplane=self.airplane_2,
+                departure_date=start,
+                arrival_date=start + timedelta(hours=2),
+            ),
+        ])
+        conflicting[1].crew.add(self.crew_1)
+
+        out = StringIO()
+        call_command("audit_schedule", stdout=out)
+        output = out.getvalue()
+
+        self.assertIn(
+            f"Airplane {self.airplane_1.id}: flight {conflicting[0].id}",
+            output,
+        )
+        self.assertIn(
+            f"Crew member {self.crew_1.id}: flight {conflicting[1].id}",
+            output,
+        )
+        self.assertIn("Found 2 schedule conflicts.", output)
+
+    def test_audit_schedule_reports_every_nested_pair(self):
+        airplane = Airplane.objects.create(
+            name="Audited plane",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=self.airplane_type,
+        )
+        start = self.flight.departure_date + timedelta(days=3)
+        Flight.objects.bulk_create([
+            Flight(
+                route=self.route_2,
+                airplane=airplane,
+                departure_date=start + timedelta(hours=begin),
+                arrival_date=start + timedelta(hours=end),
+            )
+            for begin, end in ((0, 10), (1, 3), (2, 4))
+        ])
+
+        out = StringIO()
+        call_command("audit_schedule", stdout=out)
+
+        self.assertIn("Found 3 schedule conflicts.", out.getvalue())
+
+    def test_audit_schedule_without_conflicts(self):
+        out = StringIO()
+        call_command("audit_schedule", stdout=out)
+        self.assertIn("No schedule conflicts.", out.getvalue())
+
+
+class BulkFlightImportTests(FlightBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@test.com",
+            password="testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.start = self.flight.arrival_date + timedelta(days=1)
+
+    def flight_data(self, hours, airplane=None, crew=()):
+        departure_date = self.start + timedelta(hours=hours)
+        return {
+            "route": self.route_1.id,
+            "airplane": (airplane or self.airplane_1).id,
+            "departure_date": departure_date.isoformat(),
+            "arrival_date": (departure_date + timedelta(hours=2)).isoformat(),
+            "crew": [member.id for member in crew],
+        }
+
+    def test_bulk_create_flights(self):
+        payload = [
+            self.flight_data(hours * 3, crew=[self.crew_1, self.crew_2])
+            for hours in range(50)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                FLIGHT_BULK_URL, payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 50)
+        self.assertLess(len(context), 15)
+        self.assertEqual(self.crew_2.flights.count(), 50)
+
+    def test_bulk_create_reports_conflicts_within_batch(self):
+        payload = [
+            self.flight_data(0, crew=[self.crew_1]),
+            self.flight_data(1, airplane=self.airplane_2, crew=[self.crew_1]),
+            self.flight_data(5),
+        ]
+        response = self.client.post(FLIGHT_BULK_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crew", response.data[0])
+        self.assertIn("imported flight #1", str(response.data[1]["crew"]))
+        self.assertEqual(response.data[2], {})
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_bulk_create_reports_conflicts_with_stored_flights(self):
+        payload = [self.flight_data(0)]
+        payload[0]["departure_date"] = self.flight.departure_date.isoformat()
+        payload[0]["arrival_date"] = self.flight.arrival_date.isoformat()
+        response = self.client.post(FLIGHT_BULK_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(
+            f"flight {self.flight.id}", str(response.data[0]["airplane"])
+        )
+
+    def test_bulk_create_unknown_references(self):
+        payload = [self.flight_data(0)]
+        payload[0]["route"] = 0
+        response = self.client.post(FLIGHT_BULK_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("route", response.data[0])
+
+    def test_bulk_create_from_csv(self):
+        first, second = self.flight_data(0), self.flight_data(3)
+        body = (
+            "route,airplane,departure_date,arrival_date,crew\n"
+            f"{first['route']},{first['airplane']},"
+            f"{first['departure_date']},{first['arrival_date']},"
+            f"{self.crew_1.id};{self.crew_2.id}\n"
+            f"{second['route']},{second['airplane']},"
+            f"{second['departure_date']},{second['arrival_date']},\n"
+        )
+        response = self.client.post(
+            FLIGHT_BULK_URL, body, content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        flight = Flight.objects.get(id=response.data["ids"][0])
+        self.assertEqual(flight.crew.count(), 2)
+
+    def test_bulk_create_forbidden_for_users(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            FLIGHT_BULK_URL, [self.flight_data(0)], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_schedule_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "schedule.jsonl"
+            path.write_text(
+                "\n".join(
+                    json.dumps(self.flight_data(hours, crew=[self.crew_2]))
+                    for hours in (0, 3)
+                )
+            )
+            out = StringIO()
+            call_command("import_schedule", str(path), stdout=out)
+
+            self.assertIn("Imported 2 flights.", out.getvalue())
+            self.assertEqual(self.crew_2.flights.count(), 2)
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    "import_schedule", str(path), stderr=StringIO()
+                )
+            self.assertEqual(self.crew_2.flights.count(), 2)
+
+    def test_import_schedule_command_numbers_rows_from_one(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "schedule.jsonl"
+            path.write_text(
+                "\n".join(
+                    json.dumps(self.flight_data(0)) for _ in range(2)
+                )
+            )
+            err = StringIO()
+            with self.assertRaises(CommandError):
+                call_command("import_schedule", str(path), stderr=err)
+
+        self.assertIn("Row 2:", err.getvalue())
+        self.assertIn("imported flight #1", err.getvalue())
+        self.assertIn("Row 1:", err.getvalue())
+        self.assertIn("imported flight #2", err.getvalue())
+
+
+class FlightSearchTests(FlightBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.other_type = AirplaneType.objects.create(name="Type B")
+        self.airplane_3 = Airplane.objects.create(
+            name="Plane C",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=self.other_type,
+        )
+        self.day = (self.flight.departure_date + timedelta(days=3)).date()
+        departure_date = timezone.make_aware(
+            datetime.combine(self.day, datetime.min.time())
+        ) + timedelta(hours=10)
+        self.return_flight = Flight.objects.create(
+            route=self.route_2,
+            airplane=self.airplane_3,
+            departure_date=departure_date,
+            arrival_date=departure_date + timedelta(hours=2),
+        )
+
+    def search(self, **params):
+        response = self.client.get(FLIGHT_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [flight["id"] for flight in response.data["results"]]
+
+    def test_filter_by_source_and_destination(self):
+        self.assertEqual(
+            self.search(
+                source=self.airport_2.id, destination=self.airport_1.id
+            ),
+            [self.return_flight.id],
+        )
+        self.assertEqual(
+            self.search(source=self.airport_1.id), [self.flight.id]
+        )
+
+    def test_filter_by_date(self):
+        self.assertEqual(
+            self.search(date=self.day.isoformat()),
+            [self.return_flight.id],
+        )
+        self.assertEqual(
+            self.search(date=(self.day + timedelta(days=1)).isoformat()), []
+        )
+
+    def test_filter_by_departure_window(self):
+        self.assertEqual(
+            self.search(
+                departure_after=self.day.isoformat(),
+                departure_before=self.day.isoformat(),
+            ),
+            [self.return_flight.id],
+        )
+        self.assertEqual(
+            self.search(departure_before=self.flight.arrival_date.isoformat()),
+            [self.flight.id],
+        )
+
+    def test_filter_by_airplane_type(self):
+        self.assertEqual(
+            self.search(airplane_type=self.other_type.id),
+            [self.return_flight.id],
+        )
+
+    def test_invalid_filters(self):
+        for params in ({"source": "KBP"}, {"date": "2026-13-03"}):
+            with self.subTest(params=params):
+                response = self.client.get(FLIGHT_URL, params)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_route_and_date_search_uses_index(self):
+        plan = (
+            Flight.objects.filter(
+                route__in=Route.objects.filter(
+                    source=self.airport_1, destination=self.airport_2
+                ).values("id"),
+                departure_date__gte=self.flight.departure_date,
+            )
+            .explain()
+        )
+        self.assertIn("flight_route_departure_idx", plan)
+
+
+class FlightCursorPaginationTests(FlightBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=self.user)
+        start = self.flight.departure_date + timedelta(days=1)
+        for index in range(11):
+            departure_date = start + timedelta(hours=index // 4)
+            Flight.objects.create(
+                route=self.route_2,
+                airplane=Airplane.objects.create(
+                    name=f"Paged plane {index}",
+                    rows=10,
+                    seats_in_row=6,
+                    airplane_type=self.airplane_type,
+                ),
+                departure_date=departure_date,
+                arrival_date=departure_date + timedelta(hours=index % 2 + 1),
+            )
+        self.expected = list(
+            Flight.objects.order_by(
+                "departure_date", "arrival_date", "id"
+            ).values_list("id", flat=True)
+        )
+
+    def test_walk_pages_forward_and_back(self):
+        pages = []
+        url = FLIGHT_URL + "?page_size=5"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            self.assertFalse(
+                any("COUNT(*)" in query["sql"] for query in queries)
+            )
+            pages.append(
+                [flight["id"] for flight in response.data["results"]]
+            )
+            url = response.data["next"]
+
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        url = response.data["previous"]
+        for page in reversed(pages[:-1]):
+            response = self.client.get(url)
+            self.assertEqual(
+                [flight["id"] for flight in response.data["results"]], page
+            )
+            url = response.data["previous"]
+        self.assertIsNone(url)
+
+    def test_walk_pages_with_sparse_fields(self):
+        ids = []
+        url = FLIGHT_URL + "?page_size=4&fields=id"
+        while url:
+            response = self.client.get(url)
+            ids += [flight["id"] for flight in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, self.expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(FLIGHT_URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_query_uses_index(self):
+        ordering = FlightCursorPagination.ordering
+        plan = (
+            Flight.objects.order_by(*ordering)
+            .filter(
+                FlightCursorPagination.after(
+                    ordering,
+                    [
+                        self.flight.departure_date,
+                        self.flight.arrival_date,
+                        self.flight.id,
+                    ],
+                )
+            )[:5]
+            .explain()
+        )
+        self.assertIn("flight_departure_arrival_idx", plan)
+        # One range scan in index order from the cursor
+        self.assertNotIn("MULTI-INDEX OR", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_first_page_with_tickets_available_uses_index(self):
+        plan = (
+            Flight.objects.select_related("route", "airplane")
+            .with_tickets_available()
+            .order_by(*FlightCursorPagination.ordering)[:6]
+            .explain()
+        )
+        self.assertIn("flight_departure_arrival_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_next_page_bounded_by_leading_column(self):
+        response = self.client.get(FLIGHT_URL + "?page_size=5&fields=id")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data["next"])
+
+        (query,) = queries.captured_queries
+        self.assertIn('"departure_date" >=', query["sql"])
@@ -0,0 +1,247 @@
+from datetime import date, time, timedelta, datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airservice.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Route,
+    Crew,
+    Flight,
+    FlightSchedule,
+)
+from airservice.scheduling import materialize_schedules
+
+
+FLIGHT_SCHEDULE_URL = reverse("airservice:flight_schedule-list")
+
+
+def generate_url(schedule_id):
+    return reverse(
+        "airservice:flight_schedule-generate", args=(schedule_id,)
+    )
+
+
+class FlightScheduleBaseTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.airport_1 = Airport.objects.create(
+            name="Arlanda",
+            closest_big_city="Stockholm",
+            country="Sweden",
+        )
+        cls.airport_2 = Airport.objects.create(
+            name="MUC",
+            closest_big_city="Munich",
+            country="German",
+        )
+        cls.route = Route.objects.create(
+            source=cls.airport_1,
+            destination=cls.airport_2,
+            distance=100,
+        )
+        cls.airplane_type = AirplaneType.objects.create(name="Type A")
+        cls.airplane = Airplane.objects.create(
+            name="Plane A",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=cls.airplane_type
+        )
+        cls.crew = Crew.objects.create(first_name="Jack", last_name="Jones")
+        # 2026-11-02 is a Monday
+        cls.schedule = FlightSchedule.objects.create(
+            route=cls.route,
+            airplane=cls.airplane,
+            days_of_week="135",
+            departure_time=time(10, 0),
+            duration=timedelta(hours=2),
+            valid_from=date(2026, 11, 2),
+            valid_until=date(2026, 12, 31),
+        )
+        cls.schedule.crew.add(cls.crew)
+
+
+@freeze_time("2026-11-02 08:00:00")
+class MaterializeSchedulesTests(FlightScheduleBaseTest):
+    def test_occurrences(self):
+        occurrences = list(
+            self.schedule.occurrences(date(2026, 11, 2), date(2026, 11, 8))
+        )
+        self.assertEqual(
+            [departure.date() for departure, _ in occurrences],
+            [date(2026, 11, 2), date(2026, 11, 4), date(2026, 11, 6)],
+        )
+        departure, arrival = occurrences[0]
+        self.assertEqual(
+            departure,
+            timezone.make_aware(datetime(2026, 11, 2, 10, 0)),
+        )
+        self.assertEqual(arrival - departure, timedelta(hours=2))
+
+    def test_materialize_is_incremental(self):
+        flights, conflicts = materialize_schedules(date(2026, 11, 15))
+        self.assertEqual(len(flights), 6)
+        self.assertEqual(conflicts, [])
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.generated_until, date(2026, 11, 15))
+        self.assertEqual(self.crew.flights.count(), 6)
+
+        flights, _ = materialize_schedules(date(2026, 11, 15))
+        self.assertEqual(flights, [])
+
+        flights, _ = materialize_schedules(date(2026, 11, 22))
+        self.assertEqual(len(flights), 3)
+        self.assertEqual(self.schedule.flights.count(), 9)
+
+    def test_shorter_horizon_keeps_generated_until(self):
+        materialize_schedules(date(2026, 11, 22))
+
+        flights, _ = materialize_schedules(date(2026, 11, 8))
+
+        self.assertEqual(flights, [])
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.generated_until, date(2026, 11, 22))
+
+    def test_materialize_stops_at_validity_end(self):
+        materialize_schedules(date(2027, 3, 1))
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.generated_until, date(2026, 12, 31))
+        self.assertEqual(
+            Flight.objects.latest("departure_date").departure_date.date(),
+            date(2026, 12, 30),
+        )
+
+    def test_materialize_skips_conflicting_instances(self):
+        departure_date = timezone.make_aware(datetime(2026, 11, 4, 11, 0))
+        Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_date=departure_date,
+            arrival_date=departure_date + timedelta(hours=2),
+        )
+
+        flights, conflicts = materialize_schedules(date(2026, 11, 8))
+
+        self.assertEqual(len(flights), 2)
+        self.assertEqual(len(conflicts), 1)
+        data, errors = conflicts[0]
+        self.assertEqual(data["departure_date"].date(), date(2026, 11, 4))
+        self.assertIn("airplane", errors)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.generated_until, date(2026, 11, 3))
+
+    def test_skipped_date_retried_once_free(self):
+        departure_date = timezone.make_aware(datetime(2026, 11, 4, 11, 0))
+        blocking = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_date=departure_date,
+            arrival_date=departure_date + timedelta(hours=2),
+        )
+        materialize_schedules(date(2026, 11, 8))
+        blocking.delete()
+
+        flights, conflicts = materialize_schedules(date(2026, 11, 8))
+
+        self.assertEqual(
+            [flight.departure_date.date() for flight in flights],
+            [date(2026, 11, 4)],
+        )
+        self.assertEqual(conflicts, [])
+        self.assertEqual(self.schedule.flights.count(), 3)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.generated_until, date(2026, 11, 8))
+
+    def test_past_departures_not_generated(self):
+        with freeze_time("2026-11-02 10:30:00"):
+            flights, _ = materialize_schedules(date(2026, 11, 8))
+
+        self.assertEqual(
+            [flight.departure_date.date() for flight in flights],
+            [date(2026, 11, 4), date(2026, 11, 6)],
+        )
+
+    def test_generate_flights_command(self):
+        out = StringIO()
+        call_command("generate_flights", "--days", "6", stdout=out)
+        self.assertIn("Generated 3 flights", out.getvalue())
+
+
+@freeze_time("2026-11-02 08:00:00")
+class AdminFlightScheduleApiTests(FlightScheduleBaseTest):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@test.com",
+            password="testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_schedule(self):
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "crew": [self.crew.id],
+            "days_of_week": "7",
+            "departure_time": "22:30",
+            "duration": "03:00:00",
+            "valid_from": "2026-11-01",
+            "valid_until": "2027-03-31",
+        }
+        response = self.client.post(FLIGHT_SCHEDULE_URL, payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(response.data["generated_until"])
+
+    def test_create_schedule_validates_days_and_validity(self):
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "days_of_week": "118",
+            "departure_time": "22:30",
+            "duration": "03:00:00",
+            "valid_from": "2026-11-01",
+            "valid_until": "2026-10-01",
+        }
+        response = self.client.post(FLIGHT_SCHEDULE_URL, payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("days_of_week", response.data)
+        self.assertIn("valid_until", response.data)
+
+    def test_generate(self):
+        response = self.client.post(
+            f"{generate_url(self.schedule.id)}?days=13"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 6)
+        self.assertEqual(
+            response.data["generated_until"], date(2026, 11, 15)
+        )
+        self.assertEqual(response.data["conflicts"], [])
+
+    def test_generate_rejects_negative_days(self):
+        response = self.client.post(
+            f"{generate_url(self.schedule.id)}?days=-1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("days", response.data)
+        self.schedule.refresh_from_db()
+        self.assertIsNone(self.schedule.generated_until)
+
+    def test_generate_forbidden_for_users(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com",
+            password="testpass",
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.post(generate_url(self.schedule.id))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,6 +1,13 @@
+import hashlib
+import json
 from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, OperationalError
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from django.contrib.auth import get_user_model
@@ -19,7 +26,10 @@ from airservice.models import (
     Route,
     Crew,
     Ticket,
+    SeatHold,
+    IdempotencyKey,
 )
+from airservice.pagination import OrderCursorPagination
 from airservice.serializers import (
     OrderListSerializer,
     OrderRetrieveSerializer,
@@ -135,6 +145,51 @@ class AuthenticatedOrderAndTicketApiTests(OrderAndTicketBaseTest):
         orders = [order["created_at"] for order in response.data["results"]]
         self.assertEqual(orders, sorted(orders, reverse=True))
 
+    def test_orders_cursor_pagination(self):
+        created_at = timezone.now() - timedelta(days=1)
+        for _ in range(6):
+            Order.objects.create(user=self.user)
+        Order.objects.filter(user=self.user).update(created_at=created_at)
+        expected = list(
+            Order.objects.filter(user=self.user)
+            .order_by("-created_at", "id")
+            .values_list("id", flat=True)
+        )
+
+        ids = []
+        url = ORDER_URL + "?page_size=4"
+        while url:
+            response = self.client.get(url)
+            ids += [order["id"] for order in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, expected)
+
+    def test_orders_page_query_uses_index(self):
+        ordering = OrderCursorPagination.ordering
+        plan = (
+            Order.objects.filter(user=self.user)
+            .order_by(*ordering)
+            .filter(
+                OrderCursorPagination.after(ordering, [timezone.now(), 1])
+            )[:5]
+            .explain()
+        )
+        self.assertIn("order_user_created_idx", plan)
+
+    def test_orders_list_sparse_fields_skip_ticket_prefetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                ORDER_URL, {"fields": "id,created_at"}
+            )
+
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "created_at"}
+        )
+        self.assertFalse(
+            any("airservice_ticket" in query["sql"] for query in queries)
+        )
+
     def test_retrieve_order(self):
         url = detail_url(self.order_1.id)
         response = self.client.get(url)
@@ -169,6 +224,397 @@ class AuthenticatedOrderAndTicketApiTests(OrderAndTicketBaseTest):
         self.assertEqual(ticket.seat, payload["tickets"][0]["seat"])
         self.assertEqual(ticket.flight.id, payload["tickets"][0]["flight"])
 
+    def test_create_order_query_count_does_not_depend_on_size(self):
+        def create_order(places):
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in places
+                ]
+            }
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(ORDER_URL, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context)
+
+        single = create_order([(5, 1)])
+        group = create_order([(6, seat) for seat in range(1, 7)])
+        self.assertEqual(single, group)
+        self.assertEqual(Ticket.objects.filter(row=6).count(), 6)
+
+    def test_create_order_reports_taken_places_per_ticket(self):
+        payload = {
+            "tickets": [
+                {"row": 3, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+            ]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        errors = response.data["tickets"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("already taken", str(errors[1]["seat"]))
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_create_order_rejects_duplicate_places(self):
+        payload = {
+            "tickets": [
+                {"row": 3, "seat": 1, "flight": self.flight.id},
+                {"row": 3, "seat": 1, "flight": self.flight.id},
+            ]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        errors = response.data["tickets"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("more than once", str(errors[1]["seat"]))
+
+    def test_create_order_retries_transient_errors(self):
+        bulk_create = Ticket.objects.bulk_create
+        calls = []
+
+        def flaky_bulk_create(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return bulk_create(*args, **kwargs)
+
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        with mock.patch.object(
+            Ticket.objects, "bulk_create", side_effect=flaky_bulk_create
+        ):
+            response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_create_order_conflict_after_retries(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        with mock.patch.object(
+            Ticket.objects,
+            "bulk_create",
+            side_effect=OperationalError("database is locked"),
+        ):
+            response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_create_order_does_not_retry_other_database_errors(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        with mock.patch.object(
+            Ticket.objects,
+            "bulk_create",
+            side_effect=OperationalError("no such table: ticket"),
+        ) as bulk_create:
+            with self.assertRaises(OperationalError):
+                self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(bulk_create.call_count, 1)
+
+    def test_create_order_seat_held_by_another_user(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="testpass",
+        )
+        SeatHold.objects.create(
+            flight=self.flight,
+            row=3,
+            seat=1,
+            user=other_user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("held", str(response.data["tickets"][0]["seat"]))
+
+    def test_create_order_consumes_own_holds(self):
+        for seat in (1, 2):
+            SeatHold.objects.create(
+                flight=self.flight,
+                row=3,
+                seat=seat,
+                user=self.user,
+                expires_at=timezone.now() + timedelta(minutes=5),
+            )
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(3, 2)]
+        )
+
+    def create_auto_order(self, tickets):
+        response = self.client.post(
+            ORDER_URL, {"tickets": tickets}, format="json"
+        )
+        if response.status_code != status.HTTP_201_CREATED:
+            return response, None
+        order = Order.objects.get(id=response.data["id"])
+        return response, sorted(order.tickets.values_list("row", "seat"))
+
+    def test_create_order_assigns_adjacent_seats(self):
+        response, places = self.create_auto_order(
+            [{"flight": self.flight.id, "count": 3, "together": True}]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(places, [(1, 2), (1, 3), (1, 4)])
+
+    def test_create_order_assigns_whole_free_row(self):
+        response, places = self.create_auto_order(
+            [{"flight": self.flight.id, "count": 6, "together": True}]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(places, [(3, seat) for seat in range(1, 7)])
+
+    def test_create_order_assigns_around_explicit_places(self):
+        response, places = self.create_auto_order([
+            {"flight": self.flight.id, "row": 1, "seat": 2},
+            {"flight": self.flight.id, "count": 2, "together": True},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(places, [(1, 2), (1, 3), (1, 4)])
+
+    def test_create_order_assigns_any_free_seats(self):
+        response, places = self.create_auto_order(
+            [{"flight": self.flight.id, "count": 7}]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            places, [(1, seat) for seat in range(2, 7)] + [(2, 2), (2, 3)]
+        )
+
+    def test_create_order_not_enough_free_seats(self):
+        response, _ = self.create_auto_order(
+            [{"flight": self.flight.id, "count": 59}]
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def hold(self, *places):
+        for row, seat in places:
+            SeatHold.objects.create(
+                flight=self.flight,
+                row=row,
+                seat=seat,
+                user=self.user,
+                expires_at=timezone.now() + timedelta(minutes=5),
+            )
+
+    def test_create_order_assigns_own_held_seats(self):
+        self.hold((5, 3), (5, 4))
+
+        response, places = self.create_auto_order(
+            [{"flight": self.flight.id, "count": 2, "together": True}]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(places, [(5, 3), (5, 4)])
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_create_order_assigns_own_held_seats_first(self):
+        self.hold((6, 6))
+
+        response, places = self.create_auto_order(
+            [{"flight": self.flight.id, "count": 2}]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(places, [(1, 2), (6, 6)])
+
+    def test_create_order_requires_row_and_seat_together(self):
+        response, _ = self.create_auto_order(
+            [{"flight": self.flight.id, "row": 4}]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_order_unknown_flight(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id + 100}]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", response.data["tickets"][0])
+
+    def test_create_order_idempotency_key_replays_response(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        first = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        # The purge of expired keys and the stored response
+        with self.assertNumQueries(2):
+            second = self.client.post(
+                ORDER_URL,
+                payload,
+                format="json",
+                HTTP_IDEMPOTENCY_KEY="abc",
+            )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_create_order_idempotency_key_is_per_user(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="testpass",
+        )
+        IdempotencyKey.objects.create(
+            user=other_user,
+            key="abc",
+            request_hash="",
+            status_code=201,
+            response={},
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        response = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_create_order_idempotency_key_with_different_payload(self):
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+        response = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 3, "seat": 2, "flight": self.flight.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    def test_create_order_failed_request_releases_idempotency_key(self):
+        payload = {
+            "tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]
+        }
+        response = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_create_order_expired_idempotency_key(self):
+        IdempotencyKey.objects.create(
+            user=self.user,
+            key="abc",
+            request_hash="",
+            status_code=201,
+            response={},
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        response = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_create_order_purges_expired_idempotency_keys(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="testpass",
+        )
+        for user, key in ((self.user, "old"), (other_user, "other")):
+            IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                request_hash="",
+                status_code=201,
+                response={},
+                expires_at=timezone.now() - timedelta(seconds=1),
+            )
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+
+        self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(
+            sorted(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["abc", "other"],
+        )
+
+        out = StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+        self.assertIn("Deleted 1 expired idempotency keys.", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["abc"],
+        )
+
+    def in_progress_key(self, payload, locked_until):
+        return IdempotencyKey.objects.create(
+            user=self.user,
+            key="abc",
+            request_hash=hashlib.sha256(
+                json.dumps(payload, sort_keys=True).encode()
+            ).hexdigest(),
+            expires_at=timezone.now() + timedelta(hours=1),
+            locked_until=locked_until,
+        )
+
+    def test_create_order_idempotency_key_in_progress(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        self.in_progress_key(payload, timezone.now() + timedelta(seconds=30))
+
+        response = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_create_order_idempotency_key_lease_expired(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        record = self.in_progress_key(
+            payload, timezone.now() - timedelta(seconds=1)
+        )
+
+        response = self.client.post(
+            ORDER_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        record.refresh_from_db()
+        self.assertEqual(record.status_code, status.HTTP_201_CREATED)
+
     def test_serializer_validates_row(self):
         payload = {
             "row": 33,
@@ -0,0 +1,92 @@
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from airservice.parsers import ORJSONParser
+from airservice.renderers import ORJSONRenderer
+
+
+DATA = {
+    "results": [
+        {
+            "id": 1,
+            "route": "Kyiv – Lviv\u2028",
+            "departure_date": "2026-11-03T10:00:00.123456Z",
+            "tickets_available": 180,
+            "crew": [],
+        },
+        {"id": 2, "route": None, "price": Decimal("10.50")},
+    ],
+    "next": None,
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_identical_to_json_renderer(self):
+        self.assertEqual(
+            ORJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
+
+    def test_native_datetime(self):
+        value = datetime(2026, 11, 3, 10, 0, 0, 123456, dt_timezone.utc)
+
+        self.assertEqual(
+            ORJSONRenderer().render({"at": value}),
+            b'{"at":"2026-11-03T10:00:00.123456Z"}',
+        )
+
+    def test_indent(self):
+        rendered = ORJSONRenderer().render(
+            DATA, "application/json; indent=2"
+        )
+
+        self.assertIn(b'\n  "results"', rendered)
+        self.assertEqual(
+            json.loads(rendered), json.loads(JSONRenderer().render(DATA))
+        )
+
+    def test_other_indents_rendered_by_json_renderer(self):
+        for media_type in (
+            "application/json; indent=0",
+            "application/json; indent=4",
+        ):
+            with self.subTest(media_type=media_type):
+                self.assertEqual(
+                    ORJSONRenderer().render(DATA, media_type),
+                    JSONRenderer().render(DATA, media_type),
+                )
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("airservice.renderers.orjson", None):
+            self.assertEqual(
+                ORJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+            )
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, body):
+        return ORJSONParser().parse(io.BytesIO(body))
+
+    def test_parse(self):
+        body = '{"tickets": [{"row": 1, "seat": 2}], "name": "Київ"}'
+
+        self.assertEqual(
+            self.parse(body.encode()),
+            JSONParser().parse(io.BytesIO(body.encode())),
+        )
+
+    def test_parse_error(self):
+        for body in (b'{"row": ', b'{"row": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("airservice.parsers.orjson", None):
+            self.assertEqual(self.parse(b'{"row": 1}'), {"row": 1})
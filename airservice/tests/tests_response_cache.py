@@ -0,0 +1,299 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, DatabaseError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airservice.cache import refresh_in_background
+from airservice.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Route,
+    Crew,
+    Flight,
+)
+
+
+AIRPORT_URL = reverse("airservice:airport-list")
+FLIGHT_URL = reverse("airservice:flight-list")
+ORDER_URL = reverse("airservice:order-list")
+
+
+def flight_detail_url(flight_id):
+    return reverse("airservice:flight-detail", args=(flight_id,))
+
+
+@override_settings(RESPONSE_CACHE_REFRESH_IN_BACKGROUND=False)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Entries written here are keyed by stamps that survive the
+        # rollback of the test data
+        self.addCleanup(cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.source = Airport.objects.create(
+                name="KBP", closest_big_city="Kyiv", country="Ukraine"
+            )
+            destination = Airport.objects.create(
+                name="WAW", closest_big_city="Warsaw", country="Poland"
+            )
+            route = Route.objects.create(
+                source=self.source, destination=destination, distance=700
+            )
+            airplane = Airplane.objects.create(
+                name="Plane A",
+                rows=10,
+                seats_in_row=6,
+                airplane_type=AirplaneType.objects.create(name="Type A"),
+            )
+            departure_date = timezone.now() + timedelta(days=1)
+            self.flight = Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_date=departure_date,
+                arrival_date=departure_date + timedelta(hours=2),
+            )
+            self.crew = Crew.objects.create(
+                first_name="Taras", last_name="Shevchenko"
+            )
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        response = self.client.get(AIRPORT_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(AIRPORT_URL)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_query_parameter_order_does_not_matter(self):
+        self.client.get(AIRPORT_URL + "?country=ukraine&limit=2")
+
+        with self.assertNumQueries(0):
+            self.client.get(AIRPORT_URL + "?limit=2&country=ukraine")
+
+    def test_permission_tiers_are_cached_separately(self):
+        self.client.get(AIRPORT_URL)
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testpass"
+        )
+        self.client.force_authenticate(user=admin)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(AIRPORT_URL)
+        self.assertTrue(context.captured_queries)
+
+    def test_committed_change_invalidates_cache(self):
+        self.client.get(AIRPORT_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.source.name = "Boryspil"
+            self.source.save()
+
+        response = self.client.get(AIRPORT_URL)
+        self.assertIn(
+            "Boryspil",
+            [airport["name"] for airport in response.data["results"]],
+        )
+
+    def test_uncommitted_change_bypasses_cache(self):
+        self.client.get(AIRPORT_URL)
+
+        Airport.objects.create(
+            name="LWO", closest_big_city="Lviv", country="Ukraine"
+        )
+
+        response = self.client.get(AIRPORT_URL)
+        self.assertEqual(response.data["count"], 3)
+
+    def test_crew_assignment_invalidates_flight(self):
+        self.client.get(flight_detail_url(self.flight.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.crew.add(self.crew)
+
+        response = self.client.get(flight_detail_url(self.flight.id))
+        self.assertEqual(
+            [member["id"] for member in response.data["crew"]],
+            [self.crew.id],
+        )
+
+    def buy_ticket(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                ORDER_URL,
+                {
+                    "tickets": [
+                        {"row": 1, "seat": 1, "flight": self.flight.id}
+                    ]
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_order_tickets_update_cached_flight_list(self):
+        self.client.get(FLIGHT_URL)
+
+        self.buy_ticket()
+
+        # The entry is kept, only the ticket counts are read
+        with self.assertNumQueries(1):
+            response = self.client.get(FLIGHT_URL)
+        self.assertEqual(
+            response.data["results"][0]["tickets_available"], 59
+        )
+
+    def test_order_tickets_invalidate_flight_list_without_ids(self):
+        url = FLIGHT_URL + "?fields=tickets_available"
+        self.client.get(url)
+
+        self.buy_ticket()
+
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["results"], [{"tickets_available": 59}]
+        )
+
+    def test_rolled_back_change_does_not_bypass_cache(self):
+        self.client.get(AIRPORT_URL)
+
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                Airport.objects.create(
+                    name="LWO", closest_big_city="Lviv", country="Ukraine"
+                )
+                raise DatabaseError
+
+        with self.assertNumQueries(0):
+            response = self.client.get(AIRPORT_URL)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_conditional_request_answered_from_cache(self):
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                AIRPORT_URL, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(response["ETag"], etag)
+
+    def names(self, response):
+        return [airport["name"] for airport in response.data["results"]]
+
+    def test_expired_entry_is_served_stale_while_refreshed(self):
+        self.client.get(AIRPORT_URL)
+        # update() sends no signals, so only the expiry refreshes it
+        Airport.objects.filter(pk=self.source.pk).update(name="Boryspil")
+
+        expired = timezone.now() + settings.RESPONSE_CACHE_TTL
+
+        with freeze_time(expired + timedelta(seconds=1)):
+            stale = self.client.get(AIRPORT_URL)
+            refreshed = self.client.get(AIRPORT_URL)
+
+        self.assertIn("KBP", self.names(stale))
+        self.assertIn("Boryspil", self.names(refreshed))
+
+    def test_expired_entry_is_refreshed_by_one_worker(self):
+        self.client.get(AIRPORT_URL)
+        expired = timezone.now() + settings.RESPONSE_CACHE_TTL
+
+        # Another worker holds the lock and refreshes the entry
+        with (
+            freeze_time(expired + timedelta(seconds=1)),
+            mock.patch("airservice.views.acquire_lock", return_value=None),
+            self.assertNumQueries(0),
+        ):
+            response = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("KBP", self.names(response))
+
+    def test_miss_waits_for_lock_holder_before_computing(self):
+        with (
+            mock.patch("airservice.views.acquire_lock", return_value=None),
+            mock.patch("airservice.views.is_locked", return_value=True),
+            mock.patch("airservice.views.sleep") as sleep,
+        ):
+            response = self.client.get(AIRPORT_URL)
+
+        self.assertTrue(sleep.called)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_miss_stops_waiting_once_lock_is_released(self):
+        # The holder released the lock without caching, e.g. on an error
+        with (
+            mock.patch("airservice.views.acquire_lock", return_value=None),
+            mock.patch("airservice.views.is_locked", return_value=False),
+            mock.patch("airservice.views.sleep") as sleep,
+        ):
+            response = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(RESPONSE_CACHE_REFRESH_IN_BACKGROUND=True)
+class BackgroundRefreshTests(TransactionTestCase):
+    # The refresh runs on a worker thread with its own connection, which
+    # only sees committed rows
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.airport = Airport.objects.create(
+            name="KBP", closest_big_city="Kyiv", country="Ukraine"
+        )
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_stale_entry_refreshed_on_worker_thread(self):
+        self.client.get(AIRPORT_URL)
+        Airport.objects.filter(pk=self.airport.pk).update(name="Boryspil")
+        expired = timezone.now() + settings.RESPONSE_CACHE_TTL
+        futures = []
+
+        def submit(function):
+            futures.append(refresh_in_background(function))
+
+        with (
+            freeze_time(expired + timedelta(seconds=1)),
+            mock.patch(
+                "airservice.views.refresh_in_background", side_effect=submit
+            ),
+        ):
+            stale = self.client.get(AIRPORT_URL)
+            self.assertEqual(len(futures), 1)
+            futures[0].result(timeout=10)
+
+            with self.assertNumQueries(0):
+                refreshed = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(
+            [airport["name"] for airport in stale.data["results"]], ["KBP"]
+        )
+        self.assertEqual(
+            [airport["name"] for airport in refreshed.data["results"]],
+            ["Boryspil"],
+        )
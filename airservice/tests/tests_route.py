@@ -1,14 +1,17 @@
 from datetime import timedelta
 
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
-from django.db import models
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
 
 from airservice.models import Route, Airport, Flight, AirplaneType, Airplane
 from airservice.serializers import (
@@ -101,6 +104,48 @@ class AuthenticatedRouteApiTests(RouteBaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["results"], serializer.data)
 
+    def test_routes_list_count_free_pagination(self):
+        cache.clear()
+
+        response = self.client.get(ROUTE_URL, {"limit": 3})
+        self.assertEqual(response.data["count"], 4)
+        self.assertTrue(response.data["has_next"])
+        self.assertEqual(len(response.data["results"]), 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(ROUTE_URL, {"limit": 3, "offset": 3})
+        self.assertFalse(
+            any("COUNT(*)" in query["sql"] for query in queries)
+        )
+        self.assertEqual(response.data["count"], 4)
+        self.assertFalse(response.data["has_next"])
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_routes_list_values_fast_path_is_byte_identical(self):
+        queryset = Route.objects.all()
+        rows = RouteListSerializer.values_to_representation(
+            RouteListSerializer.values_queryset(queryset)
+        )
+
+        self.assertEqual(
+            JSONRenderer().render(rows),
+            JSONRenderer().render(
+                RouteListSerializer(queryset, many=True).data
+            ),
+        )
+
+    def test_routes_list_etag_follows_airport_names(self):
+        etag = self.client.get(ROUTE_URL)["ETag"]
+        response = self.client.get(ROUTE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.airport_3.name = "Berlin Brandenburg"
+        self.airport_3.save()
+
+        response = self.client.get(ROUTE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_routes_sorted_by_source_and_destination(self):
         response = self.client.get(ROUTE_URL)
         routes = [
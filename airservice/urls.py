@@ -5,6 +5,9 @@ from airservice.views import (
     AirplaneTypeViewSet,
     RouteViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
+    ConnectionViewSet,
+    ExportViewSet,
     AirportViewSet,
     AirplaneViewSet,
     CrewViewSet,
@@ -20,7 +23,12 @@ router.register("airplane_type", AirplaneTypeViewSet, basename="airplane_type")
 router.register("airplane", AirplaneViewSet, basename="airplane")
 router.register("crew", CrewViewSet, basename="crew")
 router.register("flights", FlightViewSet, basename="flight")
+router.register(
+    "flight_schedules", FlightScheduleViewSet, basename="flight_schedule"
+)
 router.register("order", OrderViewSet, basename="order")
+router.register("connections", ConnectionViewSet, basename="connection")
+router.register("exports", ExportViewSet, basename="export")
 
 urlpatterns = [
     path("", include(router.urls)),
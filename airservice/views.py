@@ -1,17 +1,77 @@
-from django.db.models import Prefetch
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, mixins, permissions
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+from functools import partial
+from time import sleep
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from django.db.models.functions import Lower
+from django.http import HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date, parse_http_date_safe
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import viewsets, mixins, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
 from airservice.models import (
     Airport,
     Route,
     Flight,
+    FlightSchedule,
     AirplaneType,
     Airplane,
     Crew,
     Order,
+    SeatHold,
+    Ticket,
+    IdempotencyKey,
+)
+from airservice.airport_index import search_airports
+from airservice.cache import (
+    acquire_lock,
+    get_change_stamps,
+    get_deleted_at,
+    get_versions,
+    has_pending_versions,
+    is_locked,
+    model_version_name,
+    refresh_in_background,
+    release_lock,
+)
+from airservice.connections import find_connections
+from airservice.exceptions import (
+    SeatConflict,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyMismatch,
 )
+from airservice.export import (
+    DATASETS,
+    EXPORT_FORMATS,
+    dataset_queryset,
+    stream_export,
+)
+from airservice.fieldsets import narrow_queryset, parse_fields
+from airservice.negotiation import IgnoreClientContentNegotiation
+from airservice.pagination import (
+    EstimatedCountPagination,
+    FlightCursorPagination,
+    OrderCursorPagination,
+)
+from airservice.parsers import CSVParser, NDJSONParser, ORJSONParser
+from airservice.route_graph import get_route_graph
+from airservice.schema import SparseFieldsetAutoSchema
+from airservice.scheduling import import_flights, materialize_schedules
+from airservice.seating import SeatMap
 from airservice.serializers import (
     AirportSerializer,
     AirportListSerializer,
@@ -30,33 +90,454 @@ from airservice.serializers import (
     FlightSerializer,
     FlightListSerializer,
     FlightRetrieveSerializer,
+    FlightSeatMapSerializer,
+    FlightImportSerializer,
+    FlightScheduleSerializer,
+    ConnectionSerializer,
+    SeatHoldSerializer,
     OrderSerializer,
     OrderListSerializer,
     OrderRetrieveSerializer,
 )
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+def _param_to_int(name, value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer."})
+
+
+def _param_to_datetime(name, value, end_of_day=False):
+    """Parse an ISO datetime, or an ISO date meaning the start of the
+    day (or the start of the next day when ``end_of_day``)."""
+    try:
+        day = parse_date(value)
+        parsed = None if day else parse_datetime(value)
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        if end_of_day:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+    if parsed is None:
+        raise ValidationError(
+            {name: "Must be an ISO 8601 date or datetime."}
+        )
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class SparseFieldsetMixin:
+    """``?fields=a,b`` on list and retrieve: only the named serializer
+    fields are rendered, and the queryset is narrowed to the columns and
+    joins they need (see narrow_queryset)."""
+
+    schema = SparseFieldsetAutoSchema()
+    sparse_fieldset_actions = ("list", "retrieve")
+
+    def get_sparse_fields(self):
+        """Requested field names, or None when all fields are rendered."""
+        if self.action not in self.sparse_fieldset_actions:
+            return None
+        if not hasattr(self, "_sparse_fields"):
+            names = parse_fields(self.request.query_params.get("fields"))
+            if names is not None:
+                available = self.get_serializer_class()().fields
+                unknown = [name for name in names if name not in available]
+                if not names or unknown:
+                    raise ValidationError(
+                        {
+                            "fields": "Unknown fields: "
+                            + ", ".join(unknown)
+                            + ". Available fields: "
+                            + ", ".join(available)
+                            + "."
+                        }
+                    )
+            self._sparse_fields = names
+        return self._sparse_fields
+
+    def get_sparse_ordering_columns(self):
+        """Columns the paginator reads from every row."""
+        if self.action != "list" or self.paginator is None:
+            return ()
+        return [
+            field.lstrip("-")
+            for field in getattr(self.paginator, "ordering", ())
+        ]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        names = self.get_sparse_fields()
+        if names is None:
+            return queryset
+        fields = self.get_serializer_class()().fields
+        return narrow_queryset(
+            queryset,
+            {name: fields[name] for name in names},
+            self.get_sparse_ordering_columns(),
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names is not None:
+            fields = getattr(serializer, "child", serializer).fields
+            for name in set(fields) - set(names):
+                fields.pop(name)
+        return serializer
+
+
+class ConditionalGetMixin:
+    """Answer If-None-Match and If-Modified-Since with 304 Not Modified
+    before the queryset or serializer runs.
+
+    ``conditional_models`` maps actions to the models their responses
+    are built from. The ETag hashes the request path and query string
+    with MAX(updated_at) and COUNT(*) of each model, read in one query,
+    so edits, inserts and deletions all change it. Last-Modified is the
+    latest updated_at, or the latest deletion recorded by the signals
+    when that is later.
+    """
+
+    conditional_models = {}
+    # Turned off when a cache layer answers the preconditions itself
+    evaluate_preconditions = True
+    # get_change_stamps() of the request, once the validators were read
+    change_stamps = None
+
+    def get_conditional_validators(self):
+        models = self.conditional_models.get(self.action)
+        if not models or self.request.method not in ("GET", "HEAD"):
+            return None
+        stamps = [
+            self.request.get_full_path(),
+            self.request.accepted_renderer.format,
+        ]
+        rows = self.change_stamps = get_change_stamps(models)
+        changes = []
+        for model in models:
+            row = rows[model._meta.label]
+            changed_at = [
+                value
+                for value in (row["updated_at"], get_deleted_at(model))
+                if value is not None
+            ]
+            stamps.append(f"{model._meta.label}:{row['count']}")
+            stamps.extend(value.isoformat() for value in changed_at)
+            changes.extend(changed_at)
+        etag = hashlib.sha256("|".join(stamps).encode()).hexdigest()[:32]
+        return f'"{etag}"', max(changes, default=None)
+
+    def conditional_get(self, handler, request, *args, **kwargs):
+        validators = self.get_conditional_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = validators
+        timestamp = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+        response = None
+        if self.evaluate_preconditions:
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ResponseCacheMixin:
+    """Serve list and retrieve responses from the shared cache.
+
+    ``cache_models`` maps actions to the models their responses are
+    built from. The key hashes the URL with its sorted query string, the
+    renderer format and the caller's permission tier; entries record the
+    version stamps of those models, which the signals bump after every
+    committed change, and are only served while the stamps match.
+
+    Past RESPONSE_CACHE_TTL an entry is served stale while the first
+    worker to see it refreshes it, dispatching a copy of the request to
+    a new view so nothing of the answered request is reused. Misses and
+    invalidated entries are computed by the one worker holding the key's
+    lock in the cache backend; the others wait for its result, or until
+    the lock is released without one. Requests in a transaction
+    that changed cached models bypass the cache. ETag and Last-Modified
+    are kept with the entry, so hits answer conditional requests too.
+
+    Fields that change too often to be worth invalidating the entry for
+    can be left out of ``cache_models`` and brought up to date on hits
+    by ``update_cached_data``.
+    """
+
+    cache_models = {}
+    cached_headers = ("ETag", "Last-Modified")
+    lock_poll_interval = 0.05
+    # Set on the copied request that refreshes a stale entry
+    refresh_attribute = "refreshes_cached_response"
+
+    def get_permission_tier(self):
+        user = self.request.user
+        if user.is_staff:
+            return "staff"
+        return "user" if user.is_authenticated else "anonymous"
+
+    def get_cache_models(self):
+        return self.cache_models.get(self.action)
+
+    def update_cached_data(self, data):
+        """Bring the data of a cache hit up to date where its version
+        stamps do not cover it."""
+        return data
+
+    def get_response_cache_key(self):
+        """Return the cache key and the current version stamps of the
+        response, or None when it is not cached."""
+        models = self.get_cache_models()
+        if (
+            not models
+            or self.request.method not in ("GET", "HEAD")
+            or has_pending_versions()
+        ):
+            return None
+        parts = [
+            self.request.build_absolute_uri(self.request.path),
+            urlencode(
+                sorted(self.request.query_params.lists()), doseq=True
+            ),
+            self.request.accepted_renderer.format,
+            self.get_permission_tier(),
+        ]
+        digest = hashlib.sha256("|".join(parts).encode()).hexdigest()
+        return (
+            f"airservice:response:{digest}",
+            get_versions(model_version_name(model) for model in models),
+        )
+
+    def is_refresh(self):
+        return getattr(self.request, self.refresh_attribute, False)
+
+    def get_throttles(self):
+        # The refreshed request was already throttled when answered
+        if self.is_refresh():
+            return []
+        return super().get_throttles()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key()
+        if key is None:
+            return handler(request, *args, **kwargs)
+        key, versions = key
+        if self.is_refresh():
+            response, _ = self.build_entry(
+                key, versions, handler, request, *args, **kwargs
+            )
+            return response
+        entry = cache.get(key)
+        if entry is not None and entry["versions"] == versions:
+            if entry["fresh_until"] <= timezone.now():
+                self.refresh_stale_entry(key, request, *args, **kwargs)
+            entry["data"] = self.update_cached_data(entry["data"])
+            return self.entry_response(request, entry)
+
+        lock = acquire_lock(
+            key, settings.RESPONSE_CACHE_LOCK_TTL.total_seconds()
+        )
+        if lock is None:
+            entry = self.wait_for_entry(key, versions)
+            if entry is not None:
+                entry["data"] = self.update_cached_data(entry["data"])
+                return self.entry_response(request, entry)
+        try:
+            response, entry = self.build_entry(
+                key, versions, handler, request, *args, **kwargs
+            )
+        finally:
+            if lock is not None:
+                release_lock(key, lock)
+        return response if entry is None else self.entry_response(
+            request, entry
+        )
+
+    def refresh_stale_entry(self, key, request, *args, **kwargs):
+        lock = acquire_lock(
+            key, settings.RESPONSE_CACHE_LOCK_TTL.total_seconds()
+        )
+        if lock is None:
+            return
+        view = request.resolver_match.func
+        refresh_request = self.copy_request(request)
+
+        def refresh():
+            try:
+                view(refresh_request, *args, **kwargs)
+            finally:
+                release_lock(key, lock)
+
+        refresh_in_background(refresh)
+
+    def copy_request(self, request):
+        """GET request for the same URL, negotiation and caller as
+        ``request``, which may be gone by the time it is dispatched."""
+        original = request._request
+        copy = HttpRequest()
+        copy.method = "GET"
+        copy.path = original.path
+        copy.path_info = original.path_info
+        copy.META = {
+            name: value
+            for name, value in original.META.items()
+            if name not in ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+        }
+        copy.GET = original.GET.copy()
+        copy.resolver_match = original.resolver_match
+        # Authenticated already; DRF's Request accepts it as it is
+        copy._force_auth_user = request.user
+        copy._force_auth_token = request.auth
+        setattr(copy, self.refresh_attribute, True)
+        return copy
+
+    def wait_for_entry(self, key, versions):
+        """Poll for the entry another worker is building, for at most
+        RESPONSE_CACHE_LOCK_WAIT, or until it released the lock without
+        caching a response."""
+        wait = settings.RESPONSE_CACHE_LOCK_WAIT.total_seconds()
+        for _ in range(int(wait / self.lock_poll_interval)):
+            sleep(self.lock_poll_interval)
+            # Checked before the entry, which is written before the lock
+            # is released
+            locked = is_locked(key)
+            entry = cache.get(key)
+            if entry is not None and entry["versions"] == versions:
+                return entry
+            if not locked:
+                return None
+        return None
+
+    def build_entry(self, key, versions, handler, request, *args, **kwargs):
+        """Run ``handler`` and cache its response if it succeeded;
+        return the response and the entry, or None when not cached."""
+        # Conditional requests are answered from the entry instead
+        self.evaluate_preconditions = False
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response, None
+        entry = {
+            "versions": versions,
+            "fresh_until": timezone.now() + settings.RESPONSE_CACHE_TTL,
+            "data": response.data,
+            "headers": {
+                name: response[name]
+                for name in self.cached_headers
+                if response.has_header(name)
+            },
+        }
+        cache.set(
+            key,
+            entry,
+            (
+                settings.RESPONSE_CACHE_TTL
+                + settings.RESPONSE_CACHE_STALE_TTL
+            ).total_seconds(),
+        )
+        return response, entry
+
+    @staticmethod
+    def entry_response(request, entry):
+        headers = entry["headers"]
+        if "ETag" in headers or "Last-Modified" in headers:
+            not_modified = get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(
+                    headers.get("Last-Modified", "")
+                ),
+            )
+            if not_modified is not None:
+                for name, value in headers.items():
+                    not_modified[name] = value
+                return not_modified
+        return Response(entry["data"], headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ValuesListMixin(SparseFieldsetMixin):
+    """Serve ``list`` through the values() fast path of the list
+    serializer (see ValuesSerializerMixin)."""
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        names = self.get_sparse_fields()
+        queryset = serializer_class.values_queryset(
+            self.filter_queryset(self.get_queryset()),
+            names,
+            self.get_sparse_ordering_columns(),
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer_class.values_to_representation(page, names)
+            )
+        return Response(
+            serializer_class.values_to_representation(queryset, names)
+        )
+
+
+class AirportViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
+    cache_models = {"list": (Airport,), "retrieve": (Airport, Route)}
+    conditional_models = {
+        "list": (Airport,),
+        "retrieve": (Airport, Route),
+        "autocomplete": (Airport,),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        if self.action == "retrieve":
-            queryset = queryset.prefetch_related(
-                Prefetch(
-                    "routes_from",
-                    queryset=Route.objects.select_related("destination")
-                ),
-                Prefetch(
-                    "routes_to",
-                    queryset=Route.objects.select_related("source")
-                ),
-            )
+        if self.action == "list":
+            params = self.request.query_params
+            country = params.get("country")
+            if country:
+                queryset = queryset.filter(country__iexact=country)
+            name_prefix = params.get("name_prefix")
+            if name_prefix:
+                queryset = queryset.alias(name_lower=Lower("name")).filter(
+                    name_lower__startswith=name_prefix.lower()
+                )
         return queryset
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "autocomplete"):
             return AirportListSerializer
         elif self.action == "retrieve":
             return AirportRetrieveSerializer
@@ -65,6 +546,16 @@ class AirportViewSet(viewsets.ModelViewSet):
     @extend_schema(
         description="Retrieve a list of all airports."
                     " Optionally filter by country or name.",
+        parameters=[
+            OpenApiParameter(
+                "country", str, description="Country, case-insensitive."
+            ),
+            OpenApiParameter(
+                "name_prefix",
+                str,
+                description="Beginning of the name, case-insensitive.",
+            ),
+        ],
         responses=AirportListSerializer,
     )
     def list(self, request, *args, **kwargs):
@@ -76,12 +567,114 @@ class AirportViewSet(viewsets.ModelViewSet):
         responses=AirportRetrieveSerializer,
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(
+            partial(self.conditional_get, self.retrieve_from_route_graph),
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve_from_route_graph(self, request, *args, **kwargs):
+        """Routes are read from the cached route graph, so only the
+        airport itself is loaded from the database; the graph rows go
+        through the serializer's own route fields."""
+        airport = self.get_object()
+        serializer = self.get_serializer(airport)
+        route_fields = {
+            name: serializer.fields.pop(name)
+            for name in ("departure", "arrival")
+            if name in serializer.fields
+        }
+        data = serializer.data
+        if not route_fields:
+            return Response(data)
+        graph = get_route_graph(self.change_stamps)
+        names = graph.airport_names
+        rows = {
+            "departure": (
+                {
+                    "id": route_id,
+                    "source__name": airport.name,
+                    "destination__name": names[destination_id],
+                    "distance": distance,
+                }
+                for destination_id, route_id, distance in graph.routes_from(
+                    airport.id
+                )
+            ),
+            "arrival": (
+                {
+                    "id": route_id,
+                    "source__name": names[source_id],
+                    "destination__name": airport.name,
+                    "distance": distance,
+                }
+                for source_id, route_id, distance in graph.routes_to(
+                    airport.id
+                )
+            ),
+        }
+        for name, field in route_fields.items():
+            data[name] = field.child.values_to_representation(rows[name])
+        return Response(data)
+
+    @extend_schema(
+        description="Suggest airports for a partly typed name: names"
+                    " starting with the query first, then names"
+                    " containing it.",
+        parameters=[
+            OpenApiParameter(
+                "q", str, required=True, description="Typed name part."
+            ),
+            OpenApiParameter(
+                "limit",
+                int,
+                description="Number of suggestions,"
+                            f" {settings.AIRPORT_AUTOCOMPLETE_LIMIT}"
+                            " by default.",
+            ),
+        ],
+        responses=AirportListSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def autocomplete(self, request):
+        return self.conditional_get(self.suggest_airports, request)
+
+    def suggest_airports(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+        limit = _param_to_int(
+            "limit",
+            request.query_params.get(
+                "limit", settings.AIRPORT_AUTOCOMPLETE_LIMIT
+            ),
+        )
+        if not 1 <= limit <= settings.AIRPORT_AUTOCOMPLETE_MAX_LIMIT:
+            raise ValidationError(
+                {
+                    "limit": "Must be between 1 and"
+                             f" {settings.AIRPORT_AUTOCOMPLETE_MAX_LIMIT}."
+                }
+            )
+        return Response(search_airports(query, limit))
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+class RouteViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Route.objects.select_related("source", "destination").all()
     serializer_class = RouteSerializer
+    pagination_class = EstimatedCountPagination
+    cache_models = {
+        "list": (Route, Airport),
+        "retrieve": (Route, Airport, Flight, Airplane),
+    }
+    # Route details list the flights, which carry no updated_at
+    conditional_models = {"list": (Route, Airport)}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -121,9 +714,22 @@ class RouteViewSet(viewsets.ModelViewSet):
         return super().retrieve(request, *args, **kwargs)
 
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+class AirplaneTypeViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
+    cache_models = {
+        "list": (AirplaneType,),
+        "retrieve": (AirplaneType, Airplane),
+    }
+    conditional_models = {
+        "list": (AirplaneType,),
+        "retrieve": (AirplaneType, Airplane),
+    }
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -146,9 +752,20 @@ class AirplaneTypeViewSet(viewsets.ModelViewSet):
         return super().retrieve(request, *args, **kwargs)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+class AirplaneViewSet(
+    ResponseCacheMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
+    cache_models = {
+        "list": (Airplane, AirplaneType),
+        "retrieve": (Airplane, Flight, Route),
+    }
+    # Airplane details list the flights, which carry no updated_at
+    conditional_models = {"list": (Airplane, AirplaneType)}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -181,9 +798,15 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return super().retrieve(request, *args, **kwargs)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    ResponseCacheMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    cache_models = {
+        "list": (Crew,),
+        "retrieve": (Crew, Flight, Route, Airplane),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -222,13 +845,114 @@ class CrewViewSet(viewsets.ModelViewSet):
         return super().retrieve(request, *args, **kwargs)
 
 
-class FlightViewSet(viewsets.ModelViewSet):
+class FlightViewSet(
+    ResponseCacheMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     queryset = Flight.objects.select_related("route", "airplane").all()
     serializer_class = FlightSerializer
+    pagination_class = FlightCursorPagination
+    # Ticket sales would invalidate every cached page of the list, so
+    # tickets_available is updated on hits instead
+    cache_models = {
+        "list": (Flight, Route, Airplane),
+        "retrieve": (Flight, Route, Airplane, Crew),
+    }
+
+    def has_live_tickets_available(self):
+        """Whether the list response has tickets_available to update
+        on cache hits, which needs the flight IDs."""
+        fields = self.get_sparse_fields()
+        return fields is None or {"id", "tickets_available"} <= set(fields)
+
+    def get_cache_models(self):
+        models = super().get_cache_models()
+        fields = self.get_sparse_fields()
+        if (
+            self.action == "list"
+            and fields is not None
+            and "tickets_available" in fields
+            and not self.has_live_tickets_available()
+        ):
+            models += (Ticket,)
+        return models
+
+    def update_cached_data(self, data):
+        if self.action != "list" or not self.has_live_tickets_available():
+            return data
+        flights = data["results"] if isinstance(data, dict) else data
+        if not flights:
+            return data
+        tickets_available = dict(
+            Flight.objects.order_by()
+            .filter(id__in=[flight["id"] for flight in flights])
+            .with_tickets_available()
+            .values_list("id", "tickets_available")
+        )
+        for flight in flights:
+            flight["tickets_available"] = tickets_available.get(
+                flight["id"], flight["tickets_available"]
+            )
+        return data
+
+    def filter_flights(self, queryset):
+        params = self.request.query_params
+
+        source = params.get("source")
+        destination = params.get("destination")
+        if source or destination:
+            routes = Route.objects.all()
+            if source:
+                routes = routes.filter(
+                    source_id=_param_to_int("source", source)
+                )
+            if destination:
+                routes = routes.filter(
+                    destination_id=_param_to_int(
+                        "destination", destination
+                    )
+                )
+            queryset = queryset.filter(route__in=routes.values("id"))
+
+        date = params.get("date")
+        if date:
+            queryset = queryset.filter(
+                departure_date__gte=_param_to_datetime("date", date),
+                departure_date__lt=_param_to_datetime(
+                    "date", date, end_of_day=True
+                ),
+            )
+        departure_after = params.get("departure_after")
+        if departure_after:
+            queryset = queryset.filter(
+                departure_date__gte=_param_to_datetime(
+                    "departure_after", departure_after
+                )
+            )
+        departure_before = params.get("departure_before")
+        if departure_before:
+            queryset = queryset.filter(
+                departure_date__lt=_param_to_datetime(
+                    "departure_before", departure_before, end_of_day=True
+                )
+            )
+
+        airplane_type = params.get("airplane_type")
+        if airplane_type:
+            queryset = queryset.filter(
+                airplane__airplane_type_id=_param_to_int(
+                    "airplane_type", airplane_type
+                )
+            )
+        return queryset
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        if self.action == "retrieve":
+        if self.action == "list":
+            queryset = self.filter_flights(queryset)
+            fields = self.get_sparse_fields()
+            if fields is None or "tickets_available" in fields:
+                queryset = queryset.with_tickets_available()
+        elif self.action == "retrieve":
             queryset = queryset.prefetch_related("crew")
         return queryset
 
@@ -237,11 +961,45 @@ class FlightViewSet(viewsets.ModelViewSet):
             return FlightListSerializer
         elif self.action == "retrieve":
             return FlightRetrieveSerializer
+        elif self.action == "seats":
+            return FlightSeatMapSerializer
+        elif self.action == "holds":
+            return SeatHoldSerializer
+        elif self.action == "bulk":
+            return FlightImportSerializer
         return FlightSerializer
 
     @extend_schema(
-        description="Retrieve a list of flights"
-                    " with routes and airplane info.",
+        description="Retrieve a list of flights with routes,"
+                    " airplane info and the number of available tickets."
+                    " Optionally filter by airports, departure dates"
+                    " and airplane type.",
+        parameters=[
+            OpenApiParameter(
+                "source", int, description="Source airport ID."
+            ),
+            OpenApiParameter(
+                "destination", int, description="Destination airport ID."
+            ),
+            OpenApiParameter(
+                "date",
+                OpenApiTypes.DATE,
+                description="Departure day, e.g. 2026-11-03.",
+            ),
+            OpenApiParameter(
+                "departure_after",
+                OpenApiTypes.DATETIME,
+                description="Earliest departure (date or datetime).",
+            ),
+            OpenApiParameter(
+                "departure_before",
+                OpenApiTypes.DATETIME,
+                description="Latest departure; a date includes that day.",
+            ),
+            OpenApiParameter(
+                "airplane_type", int, description="Airplane type ID."
+            ),
+        ],
         responses=FlightListSerializer,
     )
     def list(self, request, *args, **kwargs):
@@ -255,8 +1013,307 @@ class FlightViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(
+        description="Retrieve the seat occupancy map of a flight,"
+                    " either as run lengths or as base64 packed bits.",
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                str,
+                enum=["rle", "bits"],
+                description="Map encoding, rle by default.",
+            ),
+        ],
+        responses=FlightSeatMapSerializer,
+    )
+    @action(detail=True, methods=["get"])
+    def seats(self, request, pk=None):
+        encoding = request.query_params.get("encoding", "rle")
+        if encoding not in ("rle", "bits"):
+            raise ValidationError(
+                {"encoding": "Encoding must be either 'rle' or 'bits'."}
+            )
+
+        flight = self.get_object()
+        seat_map = SeatMap.for_flight(flight)
+        data = {
+            "flight": flight.id,
+            "rows": seat_map.rows,
+            "seats_in_row": seat_map.seats_in_row,
+            "available": seat_map.available_count,
+            "encoding": encoding,
+        }
+        if encoding == "bits":
+            data["bitmap"] = seat_map.to_packed()
+        else:
+            data["runs"] = seat_map.to_runs()
+        return Response(data)
+
+    @extend_schema(
+        methods=["POST"],
+        description="Hold a seat on the flight for the current user for a"
+                    " limited time. Orders created by the user consume"
+                    " their holds.",
+        request=SeatHoldSerializer,
+        responses={201: SeatHoldSerializer, 409: None},
+    )
+    @extend_schema(
+        methods=["DELETE"],
+        description="Release a seat held by the current user.",
+        parameters=[
+            OpenApiParameter("row", int, required=True),
+            OpenApiParameter("seat", int, required=True),
+        ],
+        request=None,
+        responses={204: None},
+    )
+    @action(
+        detail=True,
+        methods=["post", "delete"],
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def holds(self, request, pk=None):
+        flight = self.get_object()
+        # Clients and proxies may drop the body of a DELETE
+        data = (
+            request.query_params if request.method == "DELETE"
+            else request.data
+        )
+        serializer = SeatHoldSerializer(
+            data=data, context={"flight": flight}
+        )
+        serializer.is_valid(raise_exception=True)
+        row = serializer.validated_data["row"]
+        seat = serializer.validated_data["seat"]
+
+        if request.method == "DELETE":
+            SeatHold.objects.filter(
+                flight=flight, row=row, seat=seat, user=request.user
+            ).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        hold = SeatHold.place(flight, row, seat, request.user, SeatConflict)
+        return Response(
+            SeatHoldSerializer(hold).data, status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        description="Create many flights at once from a JSON array, CSV"
+                    " (crew as ';'-separated IDs) or NDJSON body."
+                    " The whole batch is checked for airplane and crew"
+                    " conflicts and inserted atomically.",
+        request=FlightImportSerializer(many=True),
+        responses={201: None},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[ORJSONParser, CSVParser, NDJSONParser],
+    )
+    def bulk(self, request):
+        serializer = FlightImportSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        flights = import_flights(serializer.validated_data, ValidationError)
+        return Response(
+            {
+                "created": len(flights),
+                "ids": [flight.id for flight in flights],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ConnectionViewSet(viewsets.ViewSet):
+    serializer_class = ConnectionSerializer
+
+    @extend_schema(
+        description="Search itineraries of up to 3 flights between two"
+                    " airports departing on the given day. Connections"
+                    " respect the minimum and maximum layover times.",
+        parameters=[
+            OpenApiParameter(
+                "from", int, required=True,
+                description="Source airport ID.",
+            ),
+            OpenApiParameter(
+                "to", int, required=True,
+                description="Destination airport ID.",
+            ),
+            OpenApiParameter(
+                "date", OpenApiTypes.DATE, required=True,
+                description="Departure day of the first flight.",
+            ),
+            OpenApiParameter(
+                "max_legs", int, enum=[1, 2, 3],
+                description="Maximum number of flights, 3 by default.",
+            ),
+        ],
+        responses=ConnectionSerializer(many=True),
+    )
+    def list(self, request):
+        params = request.query_params
+        for name in ("from", "to", "date"):
+            if name not in params:
+                raise ValidationError({name: "This parameter is required."})
+        source_id = _param_to_int("from", params["from"])
+        destination_id = _param_to_int("to", params["to"])
+        if source_id == destination_id:
+            raise ValidationError(
+                {"to": "Must differ from the source airport."}
+            )
+        day = _param_to_datetime("date", params["date"]).date()
+        max_legs = _param_to_int("max_legs", params.get("max_legs", "3"))
+        if max_legs not in (1, 2, 3):
+            raise ValidationError({"max_legs": "Must be 1, 2 or 3."})
+
+        connections = find_connections(
+            source_id, destination_id, day, max_legs=max_legs
+        )
+        return Response(ConnectionSerializer(connections, many=True).data)
+
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        "export_format",
+        str,
+        enum=list(EXPORT_FORMATS),
+        description="Output format, ndjson by default.",
+    ),
+    OpenApiParameter(
+        "compress", str, enum=["gzip"], description="Compress the output."
+    ),
+]
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Staff-only streaming exports for bulk consumers such as the data
+    warehouse."""
+
+    permission_classes = (permissions.IsAdminUser,)
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def export(self, dataset, flight_id=None):
+        params = self.request.query_params
+        export_format = params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"export_format": "Must be either 'ndjson' or 'csv'."}
+            )
+        compress = params.get("compress")
+        if compress not in (None, "", "gzip"):
+            raise ValidationError({"compress": "Only 'gzip' is supported."})
+
+        filename = f"{dataset}.{export_format}"
+        content_type = EXPORT_FORMATS[export_format]
+        if compress:
+            filename += ".gz"
+            content_type = "application/gzip"
+        response = StreamingHttpResponse(
+            stream_export(
+                dataset_queryset(dataset, flight_id),
+                DATASETS[dataset],
+                export_format,
+                compress=bool(compress),
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+    @extend_schema(
+        description="Stream all flights as NDJSON or CSV.",
+        parameters=EXPORT_PARAMETERS,
+        responses={(200, "*/*"): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["get"])
+    def flights(self, request):
+        return self.export("flights")
+
+    @extend_schema(
+        description="Stream all tickets as NDJSON or CSV.",
+        parameters=EXPORT_PARAMETERS,
+        responses={(200, "*/*"): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["get"])
+    def tickets(self, request):
+        return self.export("tickets")
+
+    @extend_schema(
+        description="Stream the passenger manifest of a flight as NDJSON"
+                    " or CSV, ordered by seat.",
+        parameters=[
+            OpenApiParameter(
+                "flight", int, required=True, description="Flight ID."
+            ),
+            *EXPORT_PARAMETERS,
+        ],
+        responses={(200, "*/*"): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["get"])
+    def manifest(self, request):
+        if "flight" not in request.query_params:
+            raise ValidationError({"flight": "This parameter is required."})
+        flight_id = _param_to_int("flight", request.query_params["flight"])
+        if not Flight.objects.filter(id=flight_id).exists():
+            raise NotFound("Flight not found.")
+        return self.export("manifest", flight_id)
+
+
+class FlightScheduleViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = FlightSchedule.objects.select_related(
+        "route", "airplane"
+    ).prefetch_related("crew")
+    serializer_class = FlightScheduleSerializer
+
+    @extend_schema(
+        description="Generate the flights of a recurring schedule up to"
+                    " the given number of days ahead. Generation continues"
+                    " after the last generated date; instances that"
+                    " conflict with other flights are skipped and reported.",
+        parameters=[
+            OpenApiParameter(
+                "days",
+                int,
+                description="Horizon in days, FLIGHT_SCHEDULE_HORIZON"
+                            " by default.",
+            ),
+        ],
+        request=None,
+        responses={200: None},
+    )
+    @action(detail=True, methods=["post"])
+    def generate(self, request, pk=None):
+        schedule = self.get_object()
+        try:
+            days = int(
+                request.query_params.get(
+                    "days", settings.FLIGHT_SCHEDULE_HORIZON.days
+                )
+            )
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer."})
+        if days < 0:
+            raise ValidationError({"days": "Must not be negative."})
+
+        flights, conflicts = materialize_schedules(
+            timezone.localdate() + timedelta(days=days),
+            FlightSchedule.objects.filter(id=schedule.id),
+        )
+        schedule.refresh_from_db()
+        return Response({
+            "created": len(flights),
+            "generated_until": schedule.generated_until,
+            "conflicts": [
+                {"departure_date": data["departure_date"], "errors": errors}
+                for data, errors in conflicts
+            ],
+        })
+
 
 class OrderViewSet(
+    SparseFieldsetMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
@@ -266,6 +1323,7 @@ class OrderViewSet(
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         queryset = super().get_queryset().filter(user=self.request.user)
@@ -300,9 +1358,84 @@ class OrderViewSet(
         return super().retrieve(request, *args, **kwargs)
 
     @extend_schema(
-        description="Create a new order with tickets for the current user.",
+        description="Create a new order with tickets for the current user."
+                    " Retries sent with the same Idempotency-Key header"
+                    " replay the first successful response.",
+        parameters=[
+            OpenApiParameter(
+                "Idempotency-Key",
+                str,
+                OpenApiParameter.HEADER,
+                description="Client-generated unique key of the order,"
+                            " at most 255 characters.",
+            ),
+        ],
         request=OrderSerializer,
-        responses={201: OrderRetrieveSerializer},
+        responses={201: OrderSerializer},
     )
     def create(self, request, *args, **kwargs):
-        return super().create(request, *args, **kwargs)
+        key = request.headers.get("Idempotency-Key")
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > 255:
+            raise ValidationError(
+                {"Idempotency-Key": "Must be 1 to 255 characters long."}
+            )
+
+        request_hash = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        now = timezone.now()
+        locked_until = now + settings.IDEMPOTENCY_KEY_LEASE
+        # Expired keys of the user go, not only a reused one; the
+        # purge_idempotency_keys command clears those of everyone else
+        IdempotencyKey.objects.filter(user=request.user).expired().delete()
+        record = IdempotencyKey.objects.filter(
+            user=request.user, key=key
+        ).first()
+
+        if record is None:
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_hash=request_hash,
+                        expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+                        locked_until=locked_until,
+                    )
+            except IntegrityError:
+                raise IdempotencyKeyInProgress()
+        elif record.request_hash != request_hash:
+            raise IdempotencyKeyMismatch()
+        elif not record.is_completed:
+            # Take the key over when the request holding it let its lease
+            # run out; the update makes sure only one retry does.
+            taken_over = IdempotencyKey.objects.filter(
+                Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+                pk=record.pk,
+                status_code__isnull=True,
+            ).update(locked_until=locked_until)
+            if not taken_over:
+                raise IdempotencyKeyInProgress()
+        else:
+            return Response(
+                record.response,
+                status=record.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        # Only successful responses are replayed; failed attempts
+        # release the key so that the client can retry.
+        if status.is_success(response.status_code):
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=["status_code", "response"])
+        else:
+            record.delete()
+        return response